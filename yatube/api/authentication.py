@@ -0,0 +1,91 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+USER_KEY = 'jwt_user:{}'
+# В кеш попадают только эти поля: хеш пароля и прочее туда не кладётся,
+# при обращении к ним пользователь дочитывается из базы.
+USER_FIELDS = ('id', 'username', 'first_name', 'last_name', 'is_active',
+               'is_staff', 'is_superuser')
+
+
+class TokenCache:
+    """Проверенные токены процесса: подпись проверяется один раз.
+
+    Запись живёт до exp токена, всего хранится не больше size записей.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.tokens = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, raw_token):
+        key = hashlib.sha256(raw_token).digest()
+        with self.lock:
+            token = self.tokens.get(key)
+            if token is None:
+                return None
+            if token['exp'] <= time.time():
+                del self.tokens[key]
+                return None
+            self.tokens.move_to_end(key)
+            return token
+
+    def add(self, raw_token, token):
+        key = hashlib.sha256(raw_token).digest()
+        with self.lock:
+            self.tokens[key] = token
+            self.tokens.move_to_end(key)
+            while len(self.tokens) > self.size:
+                self.tokens.popitem(last=False)
+
+
+# Токены доступа и токены, проверенные через TokenVerifyView, хранятся
+# отдельно: проверка принимает и refresh-токены.
+access_tokens = TokenCache(settings.JWT_TOKEN_CACHE_SIZE)
+verified_tokens = TokenCache(settings.JWT_TOKEN_CACHE_SIZE)
+
+
+def forget_user(user_id):
+    def delete():
+        cache.delete(USER_KEY.format(user_id))
+    delete()
+    transaction.on_commit(delete)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication без запросов к базе на повторных вызовах.
+
+    Поля пользователя (USER_FIELDS) хранятся в общем кеше
+    JWT_USER_CACHE_TIMEOUT секунд и удаляются оттуда при любом
+    сохранении или удалении пользователя - смене пароля, блокировке
+    и т. п.
+    """
+
+    def get_validated_token(self, raw_token):
+        token = access_tokens.get(raw_token)
+        if token is None:
+            token = super().get_validated_token(raw_token)
+            access_tokens.add(raw_token, token)
+        return token
+
+    def get_user(self, validated_token):
+        try:
+            key = USER_KEY.format(validated_token[api_settings.USER_ID_CLAIM])
+        except KeyError:
+            return super().get_user(validated_token)
+        fields = cache.get(key)
+        if fields is None:
+            user = super().get_user(validated_token)
+            cache.set(key, [getattr(user, name) for name in USER_FIELDS],
+                      settings.JWT_USER_CACHE_TIMEOUT)
+            return user
+        return self.user_model.from_db(None, USER_FIELDS, fields)
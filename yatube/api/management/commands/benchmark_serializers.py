@@ -0,0 +1,61 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.serializers import CommentSerializer, PostSerializer
+from posts.models import Comment, Post
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает скорость сериализации списков через модели и '
+            'через values()')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        request = Request(APIRequestFactory().get('/api/v1/posts/'))
+        cases = (
+            (PostSerializer, Post.objects.order_by('-pub_date', '-id'),
+             'author'),
+            (CommentSerializer, Comment.objects.order_by('-created', '-id'),
+             'author'),
+        )
+        for serializer_class, queryset, related in cases:
+            queryset = queryset[:options['rows']]
+            serializer = serializer_class(context={'request': request})
+
+            def models():
+                return serializer_class(
+                    queryset.select_related(related), many=True,
+                    context={'request': request}
+                ).data
+
+            def values():
+                return serializer.values_data(
+                    serializer.values_queryset(queryset)
+                )
+
+            if JSONRenderer().render(models()) != (
+                    JSONRenderer().render(values())):
+                raise CommandError(
+                    f'{serializer_class.__name__}: ответы различаются'
+                )
+            rows = len(values())
+            if not rows:
+                self.stdout.write(f'{serializer_class.__name__}: нет строк')
+                continue
+            for name, func in (('модели', models), ('values()', values)):
+                started = time.perf_counter()
+                for _ in range(options['repeat']):
+                    func()
+                elapsed = time.perf_counter() - started
+                speed = rows * options['repeat'] / elapsed
+                self.stdout.write(
+                    f'{serializer_class.__name__} {name}: '
+                    f'{speed:.0f} строк/с'
+                )
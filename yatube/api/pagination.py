@@ -0,0 +1,59 @@
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from posts.paginator import KeysetPaginator
+
+
+class KeysetPagination(BasePagination):
+    """Курсорная пагинация по order_by запроса (KeysetPaginator).
+
+    Ответ: {"next": url, "previous": url, "results": [...]}, размер
+    страницы меняется параметром ?limit= до max_page_size.
+    """
+
+    page_size = settings.OBJECTS_COUNT
+    max_page_size = 100
+    page_size_query_param = 'limit'
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page = KeysetPaginator(
+            queryset, self.get_page_size(request)
+        ).page_for(request.query_params)
+        return list(self.page)
+
+    def get_link(self, param, cursor):
+        if not cursor:
+            return None
+        url = self.request.build_absolute_uri()
+        for name in ('after', 'before', 'page'):
+            url = remove_query_param(url, name)
+        return replace_query_param(url, param, cursor)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_link('after', self.page.next_cursor)),
+            ('previous', self.get_link('before', self.page.previous_cursor)),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
@@ -1,9 +1,215 @@
+from collections import OrderedDict
+from functools import partial
+
+from django.core.exceptions import FieldDoesNotExist
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from posts import uploads
 from posts.models import Comment, Group, Post, Follow, User
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
 from rest_framework.validators import UniqueTogetherValidator
 
 
-class CommentSerializer(serializers.ModelSerializer):
+def requested_fields(request):
+    """Поля из ?fields=id,text; None, если параметра нет."""
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    value = request.query_params.get('fields')
+    if not value:
+        return None
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+class SparseFieldsMixin:
+    """Оставляет в ответе только поля, перечисленные в ?fields=.
+
+    Неизвестные имена полей дают 400, а не страницу пустых объектов.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = requested_fields(self.context.get('request'))
+        if requested:
+            unknown = requested - set(self.fields)
+            if unknown:
+                raise serializers.ValidationError({
+                    'fields': ['Неизвестные поля: %s.' % ', '.join(
+                        sorted(unknown))]
+                })
+            for name in set(self.fields) - requested:
+                self.fields.pop(name)
+
+
+class ValuesMixin:
+    """Чтение списков через values() без объектов моделей и связей.
+
+    Столбцы берутся по source полей, значения проходят через
+    to_representation тех же полей, поэтому ответ совпадает с обычным.
+    """
+
+    def values_columns(self):
+        """{имя поля: (столбец values(), преобразование)} или None."""
+        model = self.Meta.model
+        columns = {}
+        for name, field in self.fields.items():
+            if isinstance(field, serializers.SlugRelatedField):
+                columns[name] = (f'{field.source}__{field.slug_field}', None)
+            elif isinstance(field, serializers.PrimaryKeyRelatedField):
+                columns[name] = (field.source, None)
+            elif isinstance(field, serializers.FileField):
+                model_field = model._meta.get_field(field.source)
+                columns[name] = (field.source, partial(
+                    _file_representation, field, model_field
+                ))
+            elif isinstance(field, (serializers.RelatedField,
+                                    serializers.BaseSerializer,
+                                    serializers.SerializerMethodField)
+                            ) or '.' in field.source or field.source == '*':
+                return None
+            else:
+                columns[name] = (field.source, field.to_representation)
+        return columns
+
+    def values_queryset(self, queryset, keys=()):
+        columns = [column for column, _ in self.values_columns().values()]
+        columns += [key.lstrip('-') for key in keys
+                    if key.lstrip('-') not in columns]
+        return queryset.values(*columns)
+
+    def object_rows(self, objects):
+        """Строки для values_data из объектов, где связи уже подставлены
+        атрибутами с именами столбцов values() (author__username)."""
+        meta = self.Meta.model._meta
+        attnames = {}
+        for column, _ in self.values_columns().values():
+            try:
+                attnames[column] = meta.get_field(column).attname
+            except FieldDoesNotExist:
+                attnames[column] = column
+        return [
+            {column: getattr(obj, attname)
+             for column, attname in attnames.items()}
+            for obj in objects
+        ]
+
+    def values_data(self, rows):
+        columns = list(self.values_columns().items())
+        return [
+            OrderedDict(
+                (name, None if row[column] is None
+                 else convert(row[column]) if convert else row[column])
+                for name, (column, convert) in columns
+            )
+            for row in rows
+        ]
+
+
+def _file_representation(field, model_field, name):
+    return field.to_representation(
+        model_field.attr_class(None, model_field, name)
+    )
+
+
+class _Prefetched:
+    """Заменяет queryset связанного поля словарём, собранным заранее."""
+
+    def __init__(self, model, objects):
+        self.model = model
+        self.objects = objects
+
+    def get(self, **kwargs):
+        (value,) = kwargs.values()
+        try:
+            return self.objects[str(value)]
+        except KeyError:
+            raise self.model.DoesNotExist
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """Проверка пачки объектов с отдельными ошибками по каждому.
+
+    Связанные объекты и уникальность проверяются одним запросом на
+    пачку, а не на каждый элемент.
+    """
+
+    def validate_items(self, extra):
+        """Список пар (validated_data, None) или (None, errors)."""
+        child = self.child
+        for name, field in child.fields.items():
+            if isinstance(field, serializers.RelatedField) and not (
+                    field.read_only):
+                field.queryset = self._prefetch(field, name)
+        unique = [
+            validator for validator in child.validators
+            if isinstance(validator, UniqueTogetherValidator)
+        ]
+        child.validators = [
+            validator for validator in child.validators
+            if validator not in unique
+        ]
+        results = []
+        for item in self.initial_data:
+            try:
+                results.append((child.run_validation(item), None))
+            except serializers.ValidationError as error:
+                results.append((None, error.detail))
+        for validator in unique:
+            self._check_unique(validator, results, extra)
+        return results
+
+    def _prefetch(self, field, name):
+        queryset = field.get_queryset()
+        key = getattr(field, 'slug_field', 'pk')
+        model_field = (queryset.model._meta.pk if key == 'pk'
+                       else queryset.model._meta.get_field(key))
+        values = set()
+        for item in self.initial_data:
+            if not isinstance(item, dict) or item.get(name) in (None, ''):
+                continue
+            try:
+                values.add(model_field.to_python(item[name]))
+            except DjangoValidationError:
+                continue
+        objects = queryset.filter(**{f'{key}__in': values})
+        return _Prefetched(queryset.model, {
+            str(getattr(obj, key)): obj for obj in objects
+        })
+
+    @staticmethod
+    def _check_unique(validator, results, extra):
+        def values(attrs):
+            attrs = {**attrs, **extra}
+            if any(name not in attrs for name in validator.fields):
+                return None
+            return tuple(getattr(attrs[name], 'pk', attrs[name])
+                         for name in validator.fields)
+
+        rows = [
+            values(attrs) for attrs, errors in results if errors is None
+        ]
+        condition = Q()
+        for row in filter(None, rows):
+            condition |= Q(**dict(zip(validator.fields, row)))
+        seen = set()
+        if condition:
+            seen = set(validator.queryset.filter(condition).values_list(
+                *validator.fields
+            ))
+        message = validator.message.format(
+            field_names=', '.join(validator.fields)
+        )
+        for position, (attrs, errors) in enumerate(results):
+            row = errors is None and values(attrs)
+            if not row:
+                continue
+            if row in seen:
+                results[position] = (None, {'non_field_errors': [message]})
+            seen.add(row)
+
+
+class CommentSerializer(SparseFieldsMixin, ValuesMixin,
+                        serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         slug_field='username', read_only=True
     )
@@ -12,15 +218,17 @@ class CommentSerializer(serializers.ModelSerializer):
         model = Comment
         fields = '__all__'
         read_only_fields = ('post',)
+        list_serializer_class = BulkListSerializer
 
 
-class GroupSerializer(serializers.ModelSerializer):
+class GroupSerializer(ValuesMixin, serializers.ModelSerializer):
     class Meta:
         model = Group
         fields = '__all__'
 
 
-class PostSerializer(serializers.ModelSerializer):
+class PostSerializer(SparseFieldsMixin, ValuesMixin,
+                     serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         slug_field='username', read_only=True
     )
@@ -28,9 +236,13 @@ class PostSerializer(serializers.ModelSerializer):
     class Meta:
         model = Post
         fields = '__all__'
+        list_serializer_class = BulkListSerializer
+
+    def validate_image(self, value):
+        return uploads.process(value)
 
 
-class FollowSerializer(serializers.ModelSerializer):
+class FollowSerializer(ValuesMixin, serializers.ModelSerializer):
     user = serializers.SlugRelatedField(
         slug_field='username', read_only=True,
         default=serializers.CurrentUserDefault()
@@ -42,6 +254,7 @@ class FollowSerializer(serializers.ModelSerializer):
     class Meta:
         model = Follow
         fields = '__all__'
+        list_serializer_class = BulkListSerializer
         validators = [
             UniqueTogetherValidator(
                 queryset=Follow.objects.all(),
@@ -0,0 +1,88 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.state import token_backend
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from posts.models import User
+
+from ..authentication import USER_KEY
+
+
+class CachedJWTAuthenticationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser',
+                                            password='password')
+
+    def setUp(self):
+        cache.clear()
+        self.token = RefreshToken.for_user(self.user)
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {self.token.access_token}'
+        )
+
+    def user_queries(self, url='/api/v1/follow/'):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        return response, [
+            query for query in queries if 'FROM "auth_user"' in query['sql']
+        ]
+
+    def test_user_cached(self):
+        """Повторный запрос с тем же токеном не читает auth_user"""
+        response, queries = self.user_queries()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 1)
+        response, queries = self.user_queries()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(queries, [])
+
+    def test_no_password_in_cache(self):
+        """В общий кеш не попадает хеш пароля"""
+        self.user_queries()
+        cached = cache.get(USER_KEY.format(self.user.pk))
+        self.assertIn(self.user.username, cached)
+        self.assertNotIn(self.user.password, cached)
+
+    def test_invalidated_on_save(self):
+        """Блокировка пользователя сразу закрывает доступ"""
+        self.user_queries()
+        user = User.objects.get(pk=self.user.pk)
+        user.is_active = False
+        user.save()
+        response, _ = self.user_queries()
+        self.assertEqual(response.status_code, 401)
+
+    def test_refresh_token_rejected(self):
+        """Проверенный refresh-токен не годится для входа"""
+        response = self.client.post('/api/v1/jwt/verify/',
+                                    {'token': str(self.token)})
+        self.assertEqual(response.status_code, 200)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        response, _ = self.user_queries()
+        self.assertEqual(response.status_code, 401)
+
+    def test_verify_fast_path(self):
+        """Повторная проверка токена отвечает из кеша"""
+        token = str(self.token.access_token)
+        with mock.patch.object(token_backend, 'decode',
+                               wraps=token_backend.decode) as decode:
+            response = self.client.post('/api/v1/jwt/verify/',
+                                        {'token': token})
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(decode.called)
+            decode.reset_mock()
+            response = self.client.post('/api/v1/jwt/verify/',
+                                        {'token': token})
+            self.assertEqual(response.status_code, 200)
+            decode.assert_not_called()
+        response = self.client.post('/api/v1/jwt/verify/',
+                                    {'token': 'broken'})
+        self.assertEqual(response.status_code, 401)
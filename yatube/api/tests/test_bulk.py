@@ -0,0 +1,115 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from posts import counters
+from posts.models import Comment, Follow, Group, Post, TimelineEntry, User
+
+
+class BulkCreateTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.follower = User.objects.create_user(username='TestFollower')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        Follow.objects.create(user=cls.follower, author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_posts(self):
+        """Пачка постов создаётся с id, счётчиками и лентой подписчиков"""
+        response = self.client.post('/api/v1/posts/', [
+            {'text': 'Первый', 'group': self.group.id},
+            {'text': 'Второй'},
+            {'text': 'Без группы', 'group': 999},
+        ], format='json')
+        self.assertEqual(response.status_code, 207)
+        data = response.json()
+        self.assertEqual([item['status'] for item in data], [201, 201, 400])
+        self.assertIn('group', data[2]['errors'])
+        ids = [item['data']['id'] for item in data[:2]]
+        self.assertEqual(
+            list(Post.objects.filter(id__in=ids).values_list('text',
+                                                             flat=True)),
+            ['Второй', 'Первый']
+        )
+        self.assertEqual(counters.stats_for(self.user).posts_count, 2)
+        self.assertEqual(TimelineEntry.objects.filter(
+            user=self.follower, post_id__in=ids).count(), 2)
+
+    def count_queries(self, url, items):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url, items, format='json')
+        self.assertEqual(response.status_code, 201)
+        return len(queries)
+
+    def test_constant_queries(self):
+        """Число запросов не растёт с размером пачки"""
+        post = Post.objects.create(text='Пост', author=self.user)
+        urls = {
+            '/api/v1/posts/': 'Пост',
+            f'/api/v1/posts/{post.id}/comments/': 'Комментарий',
+        }
+        for url, text in urls.items():
+            with self.subTest(url=url):
+                small = self.count_queries(url, [{'text': text}] * 2)
+                large = self.count_queries(url, [{'text': text}] * 20)
+                self.assertEqual(small, large)
+        self.assertEqual(counters.stats_for(self.user).posts_count, 23)
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 22)
+        self.assertEqual(TimelineEntry.objects.filter(
+            user=self.follower).count(), 23)
+
+    def test_bulk_follows(self):
+        """Подписки проверяются пачкой: себя, повтор и дубликаты"""
+        authors = [User.objects.create_user(username=f'author{i}')
+                   for i in range(3)]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/v1/follow/', [
+                {'author': 'author0'},
+                {'author': 'author1'},
+                {'author': 'author1'},
+                {'author': 'TestUser'},
+                {'author': 'nobody'},
+            ], format='json')
+        data = response.json()
+        self.assertEqual([item['status'] for item in data],
+                         [201, 201, 400, 400, 400])
+        self.assertIn('non_field_errors', data[2]['errors'])
+        self.assertIn('author', data[3]['errors'])
+        self.assertEqual(
+            set(self.user.follower.values_list('author', flat=True)),
+            {authors[0].id, authors[1].id}
+        )
+        selects = [query for query in queries
+                   if query['sql'].startswith('SELECT "posts_follow"')
+                   and 'WHERE' in query['sql']]
+        self.assertEqual(len(selects), 1)
+        self.assertEqual(counters.stats_for(self.user).following_count, 2)
+
+    def test_bulk_comments(self):
+        """Комментарии пачкой обновляют счётчик поста"""
+        post = Post.objects.create(text='Пост', author=self.user)
+        response = self.client.post(
+            f'/api/v1/posts/{post.id}/comments/',
+            [{'text': 'Один'}, {'text': 'Два'}, {'text': True}],
+            format='json'
+        )
+        self.assertEqual(response.status_code, 207)
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 2)
+        self.assertEqual(Comment.objects.filter(post=post).count(), 2)
+
+    def test_all_invalid(self):
+        """Если ничего не создано, ответ 400"""
+        response = self.client.post('/api/v1/posts/', [{'text': True}],
+                                    format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Post.objects.exists())
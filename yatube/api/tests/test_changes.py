@@ -0,0 +1,90 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from posts.models import Change, Comment, Follow, Group, Post, User
+
+URL = '/api/v1/changes/'
+
+
+class ChangesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.other = User.objects.create_user(username='TestOther')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def sync(self, since=0, **params):
+        response = self.client.get(URL, {'since': since, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_written_with_changes(self):
+        """Каждое создание, изменение и удаление попадает в журнал"""
+        group = Group.objects.create(title='Группа', slug='group')
+        post = Post.objects.create(text='Текст', author=self.user,
+                                   group=group)
+        post.text = 'Новый текст'
+        post.save()
+        Comment.objects.create(post=post, author=self.user, text='Ком')
+        Follow.objects.create(user=self.user, author=self.other)
+        Post.objects.filter(pk=post.pk).delete()
+        self.assertEqual(
+            list(Change.objects.values_list('model', 'action')),
+            [('group', 'upsert'), ('post', 'upsert'), ('post', 'upsert'),
+             ('comment', 'upsert'), ('post', 'upsert'),
+             ('follow', 'upsert'), ('comment', 'delete'),
+             ('post', 'upsert'), ('post', 'delete')]
+        )
+
+    def test_compacted_delta(self):
+        """Объект приходит один раз, в последнем состоянии"""
+        post = Post.objects.create(text='Первый', author=self.user)
+        cursor = self.sync()['next']
+        for text in ('Второй', 'Третий'):
+            post.text = text
+            post.save()
+        gone = Post.objects.create(text='Удалённый', author=self.user)
+        Post.objects.filter(pk=gone.pk).delete()
+        data = self.sync(cursor)
+        self.assertFalse(data['more'])
+        self.assertEqual(
+            [(item['type'], item['id'], item['action'])
+             for item in data['results']],
+            [('post', post.id, 'upsert'), ('post', gone.id, 'delete')]
+        )
+        self.assertEqual(data['results'][0]['data']['text'], 'Третий')
+        self.assertEqual(data['results'][0]['data']['author'], 'TestUser')
+        self.assertEqual(self.sync(data['next'])['results'], [])
+
+    def test_pages(self):
+        """По курсору next обходятся все изменения без повторов"""
+        posts = [Post.objects.create(text=str(i), author=self.user)
+                 for i in range(5)]
+        seen, cursor, more = [], 0, True
+        while more:
+            with self.assertNumQueries(2):
+                data = self.sync(cursor, limit=2)
+            seen += [item['id'] for item in data['results']]
+            cursor, more = data['next'], data['more']
+        self.assertEqual(seen, [post.id for post in posts])
+
+    def test_follows_visible_to_owner(self):
+        """Чужие подписки в журнал клиента не попадают"""
+        Follow.objects.create(user=self.other, author=self.user)
+        own = Follow.objects.create(user=self.user, author=self.other)
+        results = self.sync()['results']
+        self.assertEqual([(item['type'], item['id']) for item in results],
+                         [('follow', own.id)])
+        self.assertEqual(results[0]['data']['author'], 'TestOther')
+        self.assertEqual(APIClient().get(URL).json()['results'], [])
+
+    def test_bad_cursor(self):
+        """Нечисловой курсор - ошибка 400"""
+        response = self.client.get(URL, {'since': 'abc'})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,83 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from posts.models import Comment, Post, User
+
+
+class CommentsEndpointTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.posts = [
+            Post.objects.create(author=cls.user, text=f'Пост {i}')
+            for i in range(3)
+        ]
+        cls.comments = {
+            post.id: [
+                Comment.objects.create(post=post, author=cls.user,
+                                       text=f'{post.id}-{i}')
+                for i in range(5)
+            ]
+            for post in cls.posts[:2]
+        }
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_latest_comments(self):
+        """Последние комментарии нескольких постов одним запросом"""
+        ids = ','.join(str(post.id) for post in self.posts)
+        with self.assertNumQueries(1):
+            data = self.client.get(
+                f'/api/v1/posts/comments/?ids={ids}&limit=2'
+            ).json()
+        first, second, third = self.posts
+        self.assertEqual(
+            [comment['text'] for comment in data[str(first.id)]],
+            [f'{first.id}-4', f'{first.id}-3']
+        )
+        self.assertEqual(len(data[str(second.id)]), 2)
+        self.assertEqual(data[str(third.id)], [])
+        self.assertEqual(data[str(first.id)][0]['author'], 'TestUser')
+
+    def test_same_as_list(self):
+        """Комментарии в пакете такие же, как в списке поста"""
+        post = self.posts[0]
+        batch = self.client.get(
+            f'/api/v1/posts/comments/?ids={post.id}&limit=5'
+        ).json()[str(post.id)]
+        single = self.client.get(
+            f'/api/v1/posts/{post.id}/comments/'
+        ).json()['results']
+        self.assertEqual(batch, single)
+
+    def test_bad_ids(self):
+        """Неверный список id - ошибка 400"""
+        response = self.client.get('/api/v1/posts/comments/?ids=1,x')
+        self.assertEqual(response.status_code, 400)
+
+    def test_single_post_one_query(self):
+        """Список комментариев поста - один запрос, пост не загружается"""
+        post = self.posts[0]
+        with self.assertNumQueries(1):
+            self.client.get(f'/api/v1/posts/{post.id}/comments/')
+        response = self.client.get('/api/v1/posts/999/comments/')
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(
+            f'/api/v1/posts/{self.posts[2].id}/comments/'
+        )
+        self.assertEqual(response.json()['results'], [])
+
+    def test_create_missing_post(self):
+        """Комментарий к несуществующему посту - 404"""
+        self.client.force_authenticate(self.user)
+        response = self.client.post('/api/v1/posts/999/comments/',
+                                    {'text': 'Текст'})
+        self.assertEqual(response.status_code, 404)
+        response = self.client.post(
+            f'/api/v1/posts/{self.posts[2].id}/comments/', {'text': 'Текст'}
+        )
+        self.assertEqual(response.status_code, 201)
@@ -0,0 +1,71 @@
+import time
+
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from posts import versions
+from posts.models import Comment, Group, Post, User
+
+
+class ApiConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.post = Post.objects.create(author=cls.user, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_etag(self):
+        """Совпавший ETag даёт 304 без запросов к базе"""
+        for url in ('/api/v1/posts/', f'/api/v1/posts/{self.post.id}/',
+                    f'/api/v1/posts/{self.post.id}/comments/',
+                    '/api/v1/groups/'):
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                with self.assertNumQueries(0):
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+
+    def set_version(self, value):
+        cache.set(versions.KEY.format(versions.POSTS), value, None)
+
+    def test_last_modified(self):
+        """If-Modified-Since тоже даёт 304"""
+        self.set_version(time.time() - 10)
+        last_modified = self.client.get('/api/v1/posts/')['Last-Modified']
+        response = self.client.get('/api/v1/posts/',
+                                   HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_last_modified_same_second(self):
+        """Пока секунда версии не кончилась, Last-Modified не отдаётся,
+        и правка в ту же секунду не даёт 304 по If-Modified-Since"""
+        now = time.time()
+        self.set_version(now)
+        self.assertNotIn('Last-Modified', self.client.get('/api/v1/posts/'))
+        self.set_version(now - 10)
+        last_modified = self.client.get('/api/v1/posts/')['Last-Modified']
+        self.set_version(now)
+        response = self.client.get('/api/v1/posts/',
+                                   HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+
+    def test_changes(self):
+        """Изменения коллекции меняют ETag только у неё"""
+        comments = f'/api/v1/posts/{self.post.id}/comments/'
+        etags = {
+            url: self.client.get(url)['ETag']
+            for url in (comments, '/api/v1/groups/')
+        }
+        Comment.objects.create(post=self.post, author=self.user, text='Да')
+        self.assertNotEqual(self.client.get(comments)['ETag'],
+                            etags[comments])
+        self.assertEqual(self.client.get('/api/v1/groups/')['ETag'],
+                         etags['/api/v1/groups/'])
+        Group.objects.create(title='Группа', slug='group')
+        self.assertNotEqual(self.client.get('/api/v1/groups/')['ETag'],
+                            etags['/api/v1/groups/'])
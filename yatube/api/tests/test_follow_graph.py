@@ -0,0 +1,99 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from posts.models import Follow, User
+
+
+class FollowGraphTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.users = [
+            User.objects.create_user(username=f'user{i}') for i in range(6)
+        ]
+        center = cls.users[0]
+        for user in cls.users[1:]:
+            Follow.objects.create(user=user, author=center)
+        for user in cls.users[1:3]:
+            Follow.objects.create(user=center, author=user)
+        Follow.objects.create(user=center, author=cls.users[5])
+        Follow.objects.create(user=cls.users[1], author=cls.users[2])
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.users[1])
+
+    def walk(self, url):
+        names = []
+        while url:
+            data = self.client.get(url).json()
+            names += [(row['user'], row['author'])
+                      for row in data['results']]
+            url = data['next']
+        return names
+
+    def test_followers(self):
+        """Подписчики идут страницами по курсору"""
+        self.assertEqual(
+            self.walk('/api/v1/users/user0/followers/?limit=2'),
+            [(f'user{i}', 'user0') for i in range(1, 6)]
+        )
+
+    def test_following_and_mutuals(self):
+        """Подписки и взаимные подписки"""
+        self.assertEqual(
+            [author for _, author in self.walk(
+                '/api/v1/users/user0/following/')],
+            ['user1', 'user2', 'user5']
+        )
+        self.assertEqual(
+            [author for _, author in self.walk(
+                '/api/v1/users/user0/mutuals/')],
+            ['user1', 'user2', 'user5']
+        )
+        self.assertEqual(
+            [author for _, author in self.walk(
+                '/api/v1/users/user1/mutuals/')],
+            ['user0']
+        )
+
+    def test_unknown_user(self):
+        """Неизвестный пользователь - 404"""
+        response = self.client.get('/api/v1/users/nobody/followers/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_no_user_list(self):
+        """Списка пользователей нет: только действия над одним"""
+        for url in ('/api/v1/users/', '/api/v1/users/user0/'):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_status_one_query(self):
+        """Состояние кнопок подписки для страницы авторов - один запрос"""
+        with self.assertNumQueries(1):
+            data = self.client.get(
+                '/api/v1/follow/status/',
+                {'authors': 'user0,user2,user3', 'pairs': 'user0:user5'}
+            ).json()
+        self.assertEqual(
+            [(row['user'], row['author'], row['following']) for row in data],
+            [('user0', 'user5', True), ('user1', 'user0', True),
+             ('user1', 'user2', True), ('user1', 'user3', False)]
+        )
+
+    def test_indexes(self):
+        """Списки читаются по составным индексам без сортировки"""
+        querysets = (
+            Follow.objects.filter(author_id=1).order_by('user_id'),
+            Follow.objects.filter(user_id=1).order_by('author_id'),
+        )
+        for queryset in querysets:
+            sql, params = queryset.query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+                plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+            self.assertIn('USING COVERING INDEX', plan)
+            self.assertNotIn('TEMP B-TREE', plan)
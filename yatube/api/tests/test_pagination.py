@@ -0,0 +1,92 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from posts.models import Comment, Post, User
+from posts.paginator import encode_cursor
+from posts.tests.test_paginator import TAMPERED
+
+
+class ApiPaginationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        for i in range(25):
+            Post.objects.create(author=cls.user, text=f'Пост {i}')
+        cls.posts = list(Post.objects.order_by('-pub_date', '-id'))
+        for i in range(3):
+            Comment.objects.create(post=cls.posts[0], author=cls.user,
+                                   text=f'Комментарий {i}')
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def walk(self, url):
+        ids = []
+        while url:
+            data = self.client.get(url).json()
+            ids += [item['id'] for item in data['results']]
+            url = data['next']
+        return ids
+
+    def test_posts_cursor(self):
+        """Посты отдаются страницами по курсору без повторов"""
+        response = self.client.get('/api/v1/posts/')
+        self.assertEqual(len(response.json()['results']), 10)
+        self.assertIsNone(response.json()['previous'])
+        self.assertEqual(self.walk('/api/v1/posts/'),
+                         [post.id for post in self.posts])
+
+    def test_tampered_cursor(self):
+        """Подделанный курсор даёт первую страницу, а не 500"""
+        for values in TAMPERED:
+            with self.subTest(values=values):
+                response = self.client.get(
+                    '/api/v1/posts/', {'after': encode_cursor(values)}
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    [item['id'] for item in response.json()['results']],
+                    [post.id for post in self.posts[:10]]
+                )
+
+    def test_limit(self):
+        """Размер страницы задаётся ?limit= и ограничен сверху"""
+        data = self.client.get('/api/v1/posts/?limit=3').json()
+        self.assertEqual(len(data['results']), 3)
+        self.assertIn('limit=3', data['next'])
+        data = self.client.get('/api/v1/posts/?limit=1000').json()
+        self.assertEqual(len(data['results']), 25)
+
+    def test_comments_cursor(self):
+        """Комментарии тоже постраничные"""
+        url = f'/api/v1/posts/{self.posts[0].id}/comments/?limit=2'
+        self.assertEqual(len(self.walk(url)), 3)
+
+    def test_sparse_fields(self):
+        """?fields= ограничивает ответ и выбираемые столбцы"""
+        with CaptureQueriesContext(connection) as queries:
+            data = self.client.get('/api/v1/posts/?fields=id,text').json()
+        self.assertEqual(set(data['results'][0]), {'id', 'text'})
+        self.assertEqual(len(queries), 1)
+        sql = queries[0]['sql']
+        self.assertNotIn('"image"', sql)
+        self.assertNotIn('auth_user', sql)
+
+    def test_sparse_unknown_field(self):
+        """Неизвестное имя в ?fields= даёт 400"""
+        response = self.client.get('/api/v1/posts/?fields=id,bogus')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('bogus', response.json()['fields'][0])
+
+    def test_sparse_author(self):
+        """Автор по username достаётся тем же запросом"""
+        with CaptureQueriesContext(connection) as queries:
+            data = self.client.get(
+                '/api/v1/posts/?fields=text,author'
+            ).json()
+        self.assertEqual(data['results'][0]['author'], 'TestUser')
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"password"', queries[0]['sql'])
@@ -0,0 +1,82 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from api.serializers import CommentSerializer, PostSerializer
+from posts.models import Comment, Group, Post, User
+
+TEMP_MEDIA = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA)
+class ValuesSerializationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        group = Group.objects.create(title='Группа', slug='group')
+        cls.post = Post.objects.create(
+            author=cls.user, group=group, text='С картинкой',
+            image=SimpleUploadedFile('small.gif', SMALL_GIF,
+                                     content_type='image/gif')
+        )
+        Post.objects.create(author=cls.user, text='Без группы')
+        Comment.objects.create(post=cls.post, author=cls.user, text='Да')
+        Comment.objects.create(post=cls.post, author=cls.user, text=None)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA, ignore_errors=True)
+        super().tearDownClass()
+
+    def assertSameOutput(self, serializer_class, queryset, url):
+        request = Request(APIRequestFactory().get(url))
+        context = {'request': request}
+        serializer = serializer_class(context=context)
+        fast = serializer.values_data(serializer.values_queryset(queryset))
+        slow = serializer_class(queryset, many=True, context=context).data
+        self.assertEqual(JSONRenderer().render(fast),
+                         JSONRenderer().render(slow))
+
+    def test_same_output(self):
+        """values() даёт тот же JSON, что и обычный сериализатор"""
+        self.assertSameOutput(PostSerializer, Post.objects.order_by('id'),
+                              '/api/v1/posts/')
+        self.assertSameOutput(PostSerializer, Post.objects.order_by('id'),
+                              '/api/v1/posts/?fields=id,image,author')
+        self.assertSameOutput(CommentSerializer,
+                              Comment.objects.order_by('id'),
+                              f'/api/v1/posts/{self.post.id}/comments/')
+
+    def test_list_single_query(self):
+        """Страница списка постов - один запрос к базе"""
+        client = APIClient()
+        with CaptureQueriesContext(connection) as queries:
+            data = client.get('/api/v1/posts/').json()
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(data['results'][0]['author'], 'TestUser')
+        self.assertTrue(data['results'][1]['image'].startswith('http://'))
+
+    def test_benchmark_command(self):
+        """Команда сравнения скорости проверяет, что ответы совпадают"""
+        out = StringIO()
+        call_command('benchmark_serializers', rows=10, repeat=1, stdout=out)
+        self.assertIn('values()', out.getvalue())
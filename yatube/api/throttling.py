@@ -0,0 +1,22 @@
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle
+
+from yatube import ratelimit
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Запись через API с теми же вёдрами, что и через сайт.
+
+    Область берётся из throttle_scope view, чтение не ограничивается.
+    """
+
+    def allow_request(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        self.retry_after = None
+        if scope is None or request.method in SAFE_METHODS:
+            return True
+        self.retry_after = ratelimit.check(request, scope)
+        return self.retry_after is None
+
+    def wait(self):
+        return self.retry_after
@@ -1,57 +1,441 @@
+import time
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.http import Http404
 from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters
-from rest_framework import viewsets
+from rest_framework import serializers, status, viewsets
+from rest_framework.decorators import action
 from rest_framework.permissions import (
     IsAuthenticatedOrReadOnly,
     IsAuthenticated
 )
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework_simplejwt.tokens import UntypedToken
+from rest_framework_simplejwt.views import TokenVerifyView
 
-from posts.models import Post, Group
+from posts import bulk, changes, search, versions
+from posts.feeds import latest_comments
+from posts.models import Change, Comment, Follow, Group, Post, User
+from .authentication import verified_tokens
 from .permissions import IsAuthorOrReadOnly
 from .serializers import (
     CommentSerializer,
     PostSerializer,
     GroupSerializer,
-    FollowSerializer)
+    FollowSerializer,
+    ValuesMixin,
+    requested_fields)
+
+
+class SparseQuerysetMixin:
+    """Выбирает из базы только столбцы полей сериализатора.
+
+    Связанные объекты, которые сериализатор выводит по slug, достаются
+    тем же запросом; с ?fields= остальные столбцы не читаются.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        # Ключи сортировки нужны курсору пагинации.
+        columns = [key.lstrip('-') for key in queryset.query.order_by]
+        related = []
+        for field in self.get_serializer().fields.values():
+            if field.source == '*':
+                continue
+            if isinstance(field, serializers.SlugRelatedField):
+                related.append(field.source)
+                columns.append(f'{field.source}__{field.slug_field}')
+            else:
+                columns.append(field.source)
+        if related:
+            queryset = queryset.select_related(*related)
+        if requested_fields(self.request):
+            queryset = queryset.only(*columns)
+        return queryset
+
+
+class ConditionalGetMixin:
+    """ETag и Last-Modified по версиям коллекций (posts.versions).
+
+    Совпавший валидатор даёт 304 до запросов к базе и сериализации.
+    """
+
+    version_names = ()
+
+    def get_version_names(self):
+        return self.version_names
+
+    def conditional(self, handler, request, *args, **kwargs):
+        names = self.get_version_names()
+        etag = quote_etag(
+            versions.etag(names, request.accepted_renderer.format)
+        )
+        last_modified = int(max(versions.get(name) for name in names))
+        if time.time() < last_modified + 1:
+            # Last-Modified точен до секунды: пока секунда не кончилась,
+            # в ней возможна ещё одна правка, и If-Modified-Since с этой
+            # датой дал бы 304 на изменённые данные. Остаётся ETag.
+            last_modified = None
+        response = get_conditional_response(request, etag=etag,
+                                            last_modified=last_modified)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(super().retrieve, request, *args, **kwargs)
+
 
+class ValuesResponseMixin:
+    """Страница ответа из values() без собственного маршрута."""
 
-class CommentViewSet(viewsets.ModelViewSet):
+    def values_response(self, serializer, queryset):
+        rows = serializer.values_queryset(queryset, queryset.query.order_by)
+        page = self.paginate_queryset(rows)
+        if page is None:
+            return Response(serializer.values_data(rows))
+        return self.get_paginated_response(serializer.values_data(page))
+
+
+class ValuesListMixin(ValuesResponseMixin):
+    """Списки через values(), если сериализатор это умеет (ValuesMixin)."""
+
+    def list(self, request, *args, **kwargs):
+        serializer = self.get_serializer()
+        if not isinstance(serializer, ValuesMixin) or (
+                serializer.values_columns() is None):
+            return super().list(request, *args, **kwargs)
+        return self.values_response(
+            serializer, self.filter_queryset(self.get_queryset())
+        )
+
+
+class BulkCreateMixin:
+    """POST со списком объектов создаёт их одной пачкой.
+
+    Ответ - список {"status": 201, "data": ...} или {"status": 400,
+    "errors": ...} в порядке запроса; код ответа 201, если создано всё,
+    400, если ничего, иначе 207.
+    """
+
+    bulk_limit = 1000
+
+    def get_save_kwargs(self):
+        return {}
+
+    @transaction.atomic
+    def perform_create(self, serializer):
+        serializer.save(**self.get_save_kwargs())
+
+    def create(self, request, *args, **kwargs):
+        if not isinstance(request.data, list):
+            return super().create(request, *args, **kwargs)
+        if len(request.data) > self.bulk_limit:
+            raise serializers.ValidationError(
+                f'Не больше {self.bulk_limit} объектов за запрос.'
+            )
+        serializer = self.get_serializer(data=request.data, many=True)
+        with transaction.atomic():
+            extra = self.get_save_kwargs()
+            results = serializer.validate_items(extra)
+            model = serializer.child.Meta.model
+            objects = [
+                model(**attrs, **extra) if errors is None else errors
+                for attrs, errors in results
+            ]
+            bulk.create(model, [
+                obj for obj in objects if isinstance(obj, model)
+            ])
+        return self.bulk_response(serializer.child, objects)
+
+    @staticmethod
+    def bulk_response(serializer, objects):
+        data, created = [], 0
+        for obj in objects:
+            if not isinstance(obj, serializer.Meta.model):
+                data.append({'status': status.HTTP_400_BAD_REQUEST,
+                             'errors': obj})
+                continue
+            created += 1
+            data.append({'status': status.HTTP_201_CREATED,
+                         'data': serializer.to_representation(obj)})
+        if created == len(objects):
+            code = status.HTTP_201_CREATED
+        elif created:
+            code = status.HTTP_207_MULTI_STATUS
+        else:
+            code = status.HTTP_400_BAD_REQUEST
+        return Response(data, status=code)
+
+
+class CommentViewSet(ConditionalGetMixin, SparseQuerysetMixin,
+                     BulkCreateMixin, ValuesListMixin, viewsets.ModelViewSet):
     serializer_class = CommentSerializer
     permission_classes = (IsAuthenticatedOrReadOnly, IsAuthorOrReadOnly)
+    throttle_scope = 'comment'
 
-    def perform_create(self, serializer):
-        post = get_object_or_404(Post, pk=self.kwargs.get('post_id'))
-        serializer.save(post=post,
-                        author=self.request.user)
+    def get_version_names(self):
+        return (versions.comments(self.kwargs.get('post_id')),)
+
+    def post_exists(self):
+        return Post.objects.filter(pk=self.kwargs.get('post_id')).exists()
+
+    def get_save_kwargs(self):
+        if not self.post_exists():
+            raise Http404
+        return {'post_id': int(self.kwargs['post_id']),
+                'author': self.request.user}
 
     def get_queryset(self):
-        post = get_object_or_404(Post, pk=self.kwargs.get('post_id'))
-        return post.comments.all()
+        # Сам пост не загружается: комментарии ищутся по post_id, а его
+        # существование проверяется, только если список пуст.
+        return Comment.objects.filter(
+            post_id=self.kwargs.get('post_id')
+        ).order_by('-created', '-id')
 
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        data = getattr(response, 'data', None)
+        if isinstance(data, dict):
+            data = data.get('results')
+        if data == [] and not self.post_exists():
+            raise Http404
+        return response
 
-class GroupViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Group.objects.all()
+
+class GroupViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = Group.objects.order_by('id')
     serializer_class = GroupSerializer
+    version_names = (versions.GROUPS,)
 
 
-class PostViewSet(viewsets.ModelViewSet):
-    queryset = Post.objects.all()
+class PostViewSet(ConditionalGetMixin, SparseQuerysetMixin,
+                  BulkCreateMixin, ValuesListMixin, viewsets.ModelViewSet):
+    queryset = Post.objects.order_by('-pub_date', '-id')
     serializer_class = PostSerializer
     permission_classes = (IsAuthenticatedOrReadOnly, IsAuthorOrReadOnly,)
+    version_names = (versions.POSTS,)
+    throttle_scope = 'post'
+    comments_max_posts = 100
+    comments_max_limit = 20
 
-    def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+    def get_save_kwargs(self):
+        return {'author': self.request.user}
 
+    @action(detail=False, url_path='comments')
+    def latest_comments(self, request):
+        """Последние комментарии к постам ?ids=1,2,3 (по ?limit= на пост)."""
+        try:
+            ids = [
+                int(value)
+                for value in request.query_params.get('ids', '').split(',')
+                if value
+            ]
+            limit = int(request.query_params.get('limit', 3))
+        except ValueError:
+            raise serializers.ValidationError(
+                'ids - числа через запятую, limit - число.'
+            )
+        ids = list(dict.fromkeys(ids))
+        if len(ids) > self.comments_max_posts:
+            raise serializers.ValidationError(
+                f'Не больше {self.comments_max_posts} постов за запрос.'
+            )
+        limit = max(1, min(limit, self.comments_max_limit))
+        serializer = CommentSerializer(context=self.get_serializer_context())
+        comments = latest_comments(ids, limit)
+        rows = serializer.values_data(serializer.object_rows(comments))
+        data = {str(post_id): [] for post_id in ids}
+        for comment, row in zip(comments, rows):
+            data[str(comment.post_id)].append(row)
+        return Response(data)
 
-class FollowViewSet(viewsets.ModelViewSet):
+    @action(detail=False)
+    def search(self, request):
+        params = request.query_params
+        posts = self.get_queryset()
+        if params.get('group'):
+            posts = posts.filter(group__slug=params['group'])
+        if params.get('author'):
+            posts = posts.filter(author__username=params['author'])
+        return self.values_response(
+            self.get_serializer(), search.search(params.get('q', ''), posts)
+        )
+
+
+class FollowViewSet(BulkCreateMixin, ValuesListMixin, viewsets.ModelViewSet):
     serializer_class = FollowSerializer
     permission_classes = (IsAuthenticated,)
     filter_backends = (DjangoFilterBackend, filters.SearchFilter)
     search_fields = ('author__username',)
+    throttle_scope = 'follow'
+    status_max_pairs = 200
 
     def get_queryset(self):
-        return self.request.user.follower.all()
+        return self.request.user.follower.order_by('-id')
 
-    def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+    def get_save_kwargs(self):
+        return {'user': self.request.user}
+
+    @action(detail=False, url_path='status')
+    def follow_status(self, request):
+        """Подписан ли A на B: ?pairs=a:b,c:d или ?authors=x,y для себя.
+
+        Ответ для всех пар получается одним запросом.
+        """
+        params = request.query_params
+        pairs = [
+            tuple(pair.split(':', 1))
+            for pair in params.get('pairs', '').split(',') if ':' in pair
+        ]
+        pairs += [
+            (request.user.username, author)
+            for author in params.get('authors', '').split(',') if author
+        ]
+        pairs = list(dict.fromkeys(pairs))
+        if len(pairs) > self.status_max_pairs:
+            raise serializers.ValidationError(
+                f'Не больше {self.status_max_pairs} пар за запрос.'
+            )
+        found = set()
+        if pairs:
+            condition = Q()
+            for user, author in pairs:
+                condition |= Q(user__username=user, author__username=author)
+            found = set(Follow.objects.filter(condition).values_list(
+                'user__username', 'author__username'
+            ))
+        return Response([
+            {'user': pair[0], 'author': pair[1], 'following': pair in found}
+            for pair in pairs
+        ])
+
+
+class UserFollowsViewSet(ValuesResponseMixin, viewsets.GenericViewSet):
+    """Подписчики, подписки и взаимные подписки пользователя.
+
+    Списки идут курсором по id второго пользователя, это диапазон
+    индексов (author, user) и (user, author) без сортировки.
+    """
+
+    queryset = User.objects.all()
+    serializer_class = FollowSerializer
+    lookup_field = 'username'
+    lookup_value_regex = r'[\w.@+-]+'
+
+    def get_user_id(self):
+        return get_object_or_404(
+            User.objects.values_list('id', flat=True),
+            username=self.kwargs['username']
+        )
+
+    def follows(self, queryset):
+        return self.values_response(self.get_serializer(), queryset)
+
+    @action(detail=True)
+    def followers(self, request, username=None):
+        return self.follows(Follow.objects.filter(
+            author_id=self.get_user_id()
+        ).order_by('user_id'))
+
+    @action(detail=True)
+    def following(self, request, username=None):
+        return self.follows(Follow.objects.filter(
+            user_id=self.get_user_id()
+        ).order_by('author_id'))
+
+    @action(detail=True)
+    def mutuals(self, request, username=None):
+        user_id = self.get_user_id()
+        return self.follows(Follow.objects.filter(
+            user_id=user_id
+        ).annotate(mutual=Exists(Follow.objects.filter(
+            user_id=OuterRef('author_id'), author_id=user_id
+        ))).filter(mutual=True).order_by('author_id'))
+
+
+class CachedTokenVerifyView(TokenVerifyView):
+    """Уже проверенный и не истёкший токен подтверждается без разбора."""
+
+    def post(self, request, *args, **kwargs):
+        token = request.data.get('token')
+        if not isinstance(token, str):
+            return super().post(request, *args, **kwargs)
+        if verified_tokens.get(token.encode()) is not None:
+            return Response({}, status=status.HTTP_200_OK)
+        response = super().post(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            verified_tokens.add(token.encode(), UntypedToken(token))
+        return response
+
+
+class ChangesView(APIView):
+    """Что изменилось после ?since=<курсор>: по записи на объект.
+
+    Для живого объекта отдаются его текущие данные, для удалённого -
+    только тип и id. Подписки видны только их владельцу. Клиент хранит
+    next и запрашивает снова, пока more истинно.
+    """
+
+    default_limit = 100
+    max_limit = 500
+    serializers = {
+        'post': PostSerializer,
+        'comment': CommentSerializer,
+        'group': GroupSerializer,
+        'follow': FollowSerializer,
+    }
+
+    def get(self, request):
+        since = self.int_param('since', 0)
+        limit = min(self.int_param('limit', self.default_limit) or 1,
+                    self.max_limit)
+        items = changes.since(since, limit + 1, request.user)
+        more, items = len(items) > limit, items[:limit]
+        data = self.current_data(items)
+        results = []
+        for item in items:
+            row = data.get((item.model, item.object_id))
+            result = {'type': item.model, 'id': item.object_id,
+                      'action': Change.DELETE if row is None
+                      else Change.UPSERT}
+            if row is not None:
+                result['data'] = row
+            results.append(result)
+        return Response({
+            'next': str(items[-1].id if items else since),
+            'more': more,
+            'results': results,
+        })
+
+    def int_param(self, name, default):
+        value = self.request.query_params.get(name, '')
+        if not value:
+            return default
+        if not value.isdigit():
+            raise serializers.ValidationError({name: 'Ожидается число.'})
+        return int(value)
+
+    def current_data(self, items):
+        """{(модель, id): данные} одним запросом на модель."""
+        data = {}
+        for name, queryset in changes.current(items).items():
+            serializer = self.serializers[name](
+                context={'request': self.request}
+            )
+            rows = serializer.values_queryset(queryset, ('id',))
+            for row, values in zip(rows, serializer.values_data(rows)):
+                data[(name, row['id'])] = values
+        return data
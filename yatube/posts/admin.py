@@ -1,5 +1,6 @@
 from django.contrib import admin
 
+from . import search
 from .models import Post, Group, Follow, Comment
 
 
@@ -9,6 +10,13 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return queryset.filter(
+            id__in=search.matching_ids(search_term)
+        ), False
+
 
 class GroupAdmin(admin.ModelAdmin):
     list_display = ('title', 'slug', 'description')
@@ -0,0 +1,144 @@
+import datetime as dt
+import uuid
+from functools import wraps
+
+from django.core.cache import cache
+from django.http import Http404, HttpResponse, HttpResponseRedirect
+from django.utils import timezone
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import urlencode
+
+from yatube import replicas
+
+from .models import Post
+from .paginator import KeysetPaginator
+
+VERSION_KEY = 'archive_version:{}-{}'
+GLOBAL_KEY = 'archive_version'
+PAGE_KEY = 'archive_page:{}:{}:{}'
+CURSOR_PARAMS = ('after', 'before')
+MAX_AGE = 365 * 24 * 60 * 60
+
+
+def month_range(year, month):
+    start = timezone.make_aware(dt.datetime(year, month, 1))
+    if month == 12:
+        year, month = year + 1, 0
+    return start, timezone.make_aware(dt.datetime(year, month + 1, 1))
+
+
+def previous_month(year, month):
+    return (year - 1, 12) if month == 1 else (year, month - 1)
+
+
+def next_month(year, month):
+    return (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def last_closed():
+    now = timezone.localtime()
+    return previous_month(now.year, now.month)
+
+
+def is_closed(year, month):
+    return month_range(year, month)[1] <= timezone.now()
+
+
+def _version(key):
+    current = cache.get(key)
+    if current is None:
+        current = uuid.uuid4().hex
+        cache.set(key, current, None)
+    return current
+
+
+def version(year, month):
+    return '{}-{}'.format(_version(GLOBAL_KEY),
+                          _version(VERSION_KEY.format(year, month)))
+
+
+def bump(pub_date):
+    """Пост закрытого месяца изменили или удалили: страницы месяца
+    отрисуются заново. Уже отданные копии у клиентов не отзываются."""
+    date = timezone.localtime(pub_date)
+    cache.set(VERSION_KEY.format(date.year, date.month), uuid.uuid4().hex,
+              None)
+
+
+def bump_range(start, end):
+    """bump() для каждого месяца от start до end включительно."""
+    start, end = timezone.localtime(start), timezone.localtime(end)
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        bump(month_range(year, month)[0])
+        year, month = next_month(year, month)
+
+
+def bump_all():
+    """Группу переименовали или удалили: её посты меняются через UPDATE
+    без сигналов, поэтому заново рисуются все страницы архива."""
+    cache.set(GLOBAL_KEY, uuid.uuid4().hex, None)
+
+
+def cursor_query(request):
+    """Единственный параметр курсора запроса, если других нет.
+
+    None - в запросе есть что-то ещё, такой адрес не кешируется.
+    """
+    params = [(key, value) for key, values in request.GET.lists()
+              for value in values]
+    if not params:
+        return []
+    if len(params) == 1 and params[0][0] in CURSOR_PARAMS:
+        return params
+    return None
+
+
+def is_real_cursor(params):
+    """Курсор указывает на существующий пост: число страниц в кеше
+    ограничено числом постов, а не фантазией клиента."""
+    if not params:
+        return True
+    return KeysetPaginator(Post.objects.all(), 1).exists(params[0][1])
+
+
+def stored(view):
+    """Страница закрытого месяца для гостя: один раз отрисованный HTML
+    из кеша, без запросов к базе, и Cache-Control на год вперёд.
+
+    Вошедшие пользователи видят свою навигацию, им страница рисуется
+    обычным образом. Кроме курсора, параметры запроса не принимаются:
+    такие адреса перенаправляются на адрес без них.
+    """
+    @wraps(view)
+    def wrapper(request, *args, year, month, **kwargs):
+        if not 1 <= month <= 12 or not 1 <= year <= 9998:
+            raise Http404
+        if (not is_closed(year, month) or request.method != 'GET'
+                or request.user.is_authenticated):
+            return view(request, *args, year=year, month=month, **kwargs)
+        params = cursor_query(request)
+        if params is None:
+            params = [(key, value) for key, value in request.GET.items()
+                      if key in CURSOR_PARAMS][:1]
+            return HttpResponseRedirect(
+                request.path + ('?' + urlencode(params) if params else '')
+            )
+        key = PAGE_KEY.format(version(year, month), request.path,
+                              urlencode(params))
+        content = cache.get(key)
+        if content is None:
+            response = view(request, *args, year=year, month=month,
+                            **kwargs)
+            if response.status_code != 200:
+                return response
+            content = response.content
+            # Ответ из отставшей реплики не запоминается под новой версией.
+            if is_real_cursor(params) and not replicas.lagging():
+                cache.set(key, content, None)
+        response = HttpResponse(content)
+        patch_cache_control(response, public=True, max_age=MAX_AGE,
+                            immutable=True)
+        patch_vary_headers(response, ('Cookie',))
+        return response
+    return wrapper
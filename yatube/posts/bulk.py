@@ -0,0 +1,27 @@
+from django.db import connections, router, transaction
+from django.dispatch import Signal
+
+# Пачка объектов создана: обработчики обновляют счётчики, ленты, поиск
+# и журнал изменений разом для всей пачки, а не по post_save на объект.
+bulk_created = Signal(providing_args=['objects', 'using'])
+
+
+def create(model, objects, batch_size=500):
+    """bulk_create, после которого у объектов есть id и отработал
+    bulk_created - то же, что post_save делает при save()."""
+    using = router.db_for_write(model)
+    with transaction.atomic(using=using):
+        model.objects.using(using).bulk_create(objects, batch_size)
+        features = connections[using].features
+        if objects and not features.can_return_ids_from_bulk_insert:
+            # SQLite не возвращает id вставленных строк. Блокировка записи
+            # держится до конца транзакции, поэтому наши строки - последние
+            # по возрастающему AUTOINCREMENT.
+            ids = model.objects.using(using).order_by('-pk').values_list(
+                'pk', flat=True
+            )[:len(objects)]
+            for obj, pk in zip(objects, reversed(list(ids))):
+                obj.pk = pk
+        if objects:
+            bulk_created.send(sender=model, objects=objects, using=using)
+    return objects
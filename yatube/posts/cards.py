@@ -0,0 +1,43 @@
+import uuid
+
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from . import versions
+
+VERSION_KEY = 'post_card_version:{}'
+CARD_KEY = 'post_card:{}:{}'
+
+
+def version(post_id):
+    key = VERSION_KEY.format(post_id)
+    current = cache.get(key)
+    if current is None:
+        # Версия не счётчик: после вытеснения ключа из кеша новая версия
+        # не совпадёт ни с одним старым фрагментом.
+        current = uuid.uuid4().hex
+        cache.set(key, current, None)
+    return current
+
+
+def bump(post_id):
+    bump_many([post_id])
+
+
+def bump_many(post_ids):
+    cache.set_many({
+        VERSION_KEY.format(post_id): uuid.uuid4().hex
+        for post_id in post_ids
+    }, None)
+    # Изменилась карточка - изменились и ленты, где она показана.
+    versions.bump(versions.POSTS)
+
+
+def render(post):
+    key = CARD_KEY.format(post.id, version(post.id))
+    html = cache.get(key)
+    if html is None:
+        html = render_to_string('includes/cardpost_body.html', {'post': post})
+        cache.set(key, html, None)
+    return mark_safe(html)
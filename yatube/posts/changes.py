@@ -0,0 +1,60 @@
+from django.db.models import Max, Q
+
+from .models import Change, Comment, Follow, Group, Post
+
+MODELS = {model._meta.model_name: model
+          for model in (Post, Comment, Follow, Group)}
+OWNERS = {'follow': 'user_id'}
+
+
+def record(instance, action):
+    """Пишет изменение в журнал в транзакции самого изменения."""
+    name = instance._meta.model_name
+    owner = OWNERS.get(name)
+    Change.objects.create(
+        model=name, object_id=instance.pk, action=action,
+        owner_id=owner and getattr(instance, owner)
+    )
+
+
+def record_objects(objects, action=Change.UPSERT):
+    """record() для пачки объектов одной модели одним запросом."""
+    Change.objects.bulk_create([
+        Change(model=obj._meta.model_name, object_id=obj.pk, action=action,
+               owner_id=OWNERS.get(obj._meta.model_name) and getattr(
+                   obj, OWNERS[obj._meta.model_name]))
+        for obj in objects
+    ])
+
+
+def record_many(model, ids, action=Change.UPSERT):
+    Change.objects.bulk_create([
+        Change(model=model._meta.model_name, object_id=pk, action=action)
+        for pk in ids
+    ])
+
+
+def since(cursor, limit, user=None):
+    """Сжатые изменения после cursor: по одной последней на объект.
+
+    Объекты идут в порядке их последнего изменения, поэтому следующий
+    курсор - id последней отданной записи. SQLite пишет транзакции по
+    одной, и id в журнале фиксируются в порядке возрастания.
+    """
+    visible = Q(owner_id__isnull=True)
+    if user is not None and user.is_authenticated:
+        visible |= Q(owner_id=user.pk)
+    latest = Change.objects.filter(visible, id__gt=cursor).values(
+        'model', 'object_id'
+    ).annotate(last=Max('id')).values('last')
+    return list(Change.objects.filter(id__in=latest).order_by('id')[:limit])
+
+
+def current(changes):
+    """{имя модели: queryset} живых объектов из upsert-записей."""
+    ids = {}
+    for change in changes:
+        if change.action == Change.UPSERT:
+            ids.setdefault(change.model, []).append(change.object_id)
+    return {name: MODELS[name].objects.filter(id__in=pks)
+            for name, pks in ids.items()}
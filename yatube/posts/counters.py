@@ -0,0 +1,67 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Follow, Post, User, UserStats
+
+
+def _count(queryset, field):
+    return Coalesce(Subquery(
+        queryset.filter(**{field: OuterRef('pk')}).order_by().values(
+            field
+        ).annotate(count=Count('pk')).values('count')
+    ), 0)
+
+
+def stats_for(user):
+    stats = UserStats.objects.filter(user=user).first()
+    return stats or recount_user(user)
+
+
+def recount_user(user):
+    counts = User.objects.filter(pk=user.pk).annotate(
+        posts_count=_count(Post.objects.all(), 'author'),
+        followers_count=_count(Follow.objects.all(), 'author'),
+        following_count=_count(Follow.objects.all(), 'user'),
+    ).values('posts_count', 'followers_count', 'following_count').get()
+    stats, _ = UserStats.objects.update_or_create(user=user, defaults=counts)
+    return stats
+
+
+def change_user(user_id, **deltas):
+    # Строки ещё нет: stats_for() посчитает её целиком при первом чтении.
+    UserStats.objects.filter(user=user_id).update(**{
+        field: F(field) + delta for field, delta in deltas.items()
+    })
+
+
+def change_comments(post_id, delta):
+    Post.objects.filter(pk=post_id).update(
+        comment_count=F('comment_count') + delta
+    )
+
+
+def repair():
+    """Пересчитывает все счётчики, возвращает число исправленных строк."""
+    posts = Post.objects.annotate(
+        actual=_count(Comment.objects.all(), 'post')
+    ).exclude(comment_count=F('actual'))
+    repaired = 0
+    for post_id, actual in posts.values_list('pk', 'actual').iterator():
+        Post.objects.filter(pk=post_id).update(comment_count=actual)
+        repaired += 1
+    users = User.objects.annotate(
+        actual_posts=_count(Post.objects.all(), 'author'),
+        actual_followers=_count(Follow.objects.all(), 'author'),
+        actual_following=_count(Follow.objects.all(), 'user'),
+        stored_posts=F('stats__posts_count'),
+        stored_followers=F('stats__followers_count'),
+        stored_following=F('stats__following_count'),
+    )
+    for user in users.iterator():
+        if (user.stored_posts, user.stored_followers,
+                user.stored_following) != (user.actual_posts,
+                                           user.actual_followers,
+                                           user.actual_following):
+            recount_user(user)
+            repaired += 1
+    return repaired
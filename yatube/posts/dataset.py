@@ -0,0 +1,268 @@
+import bisect
+import datetime as dt
+import itertools
+import math
+import random
+from array import array
+from contextlib import contextmanager
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Max
+from django.utils import timezone
+from PIL import Image
+
+from .models import Comment, Follow, Group, Post, User, UserStats
+
+WORDS = (
+    'день', 'город', 'лето', 'море', 'книга', 'дорога', 'утро', 'кофе',
+    'работа', 'проект', 'друзья', 'фото', 'вечер', 'дождь', 'музыка',
+    'кино', 'поезд', 'горы', 'снег', 'код', 'python', 'django', 'сегодня',
+    'снова', 'очень', 'новый', 'старый', 'хороший', 'первый', 'последний',
+    'думаю', 'смотрю', 'читаю', 'пишу', 'жду', 'помню', 'люблю', 'знаю',
+    'и', 'в', 'на', 'с', 'по', 'но', 'как', 'что', 'это', 'уже', 'ещё',
+)
+IMAGE_NAME = 'posts/dataset/{}.jpg'
+
+
+class PowerLaw:
+    """Выбор номера из n с весом 1 / (номер + 1) ** alpha."""
+
+    def __init__(self, rng, n, alpha):
+        self.rng = rng
+        self.cumulative = array('d', itertools.accumulate(
+            (rank + 1) ** -alpha for rank in range(n)
+        ))
+
+    def pick(self):
+        point = self.rng.random() * self.cumulative[-1]
+        return min(bisect.bisect(self.cumulative, point),
+                   len(self.cumulative) - 1)
+
+
+class Batch:
+    """Копит объекты и пишет их bulk_create по size штук.
+
+    before - пачка, которую нужно записать раньше этой: на её строки
+    ссылаются внешние ключи.
+    """
+
+    def __init__(self, model, size, before=None):
+        self.model = model
+        self.size = size
+        self.before = before
+        self.objects = []
+        self.count = 0
+
+    def add(self, obj):
+        self.objects.append(obj)
+        if len(self.objects) >= self.size:
+            self.flush()
+
+    def flush(self):
+        if self.before is not None:
+            self.before.flush()
+        if self.objects:
+            self.model.objects.bulk_create(self.objects)
+            self.count += len(self.objects)
+            self.objects = []
+
+
+@contextmanager
+def explicit_dates():
+    """bulk_create с заданными датами вместо auto_now_add."""
+    fields = [Post._meta.get_field('pub_date'),
+              Comment._meta.get_field('created')]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def heavy_tail(rng, mean, sigma=1.0):
+    """Целое из логнормального распределения с заданным средним."""
+    if mean <= 0:
+        return 0
+    return int(rng.lognormvariate(math.log(mean) - sigma ** 2 / 2, sigma))
+
+
+def next_id(model):
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+def text(rng, mean_words):
+    words = max(1, heavy_tail(rng, mean_words, 0.6))
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def make_images(rng, count):
+    names = []
+    for number in range(count):
+        name = IMAGE_NAME.format(number)
+        if not default_storage.exists(name):
+            data = BytesIO()
+            color = tuple(rng.randrange(256) for _ in range(3))
+            Image.new('RGB', (800, 600), color).save(data, 'JPEG')
+            default_storage.save(name, ContentFile(data.getvalue()))
+        names.append(name)
+    return names
+
+
+class Generator:
+    """Воспроизводимый набор данных с распределениями как в жизни.
+
+    Подписчики и активность авторов - степенные законы: немногие
+    собирают большинство подписок, немногие пишут большинство постов.
+    Это разные люди - иначе посты самых активных размножались бы по
+    лентам самых многочисленных подписчиков. Посты идут сериями с
+    короткими паузами, комментарии к постам - с тяжёлым хвостом.
+    Строки пишутся пачками, в памяти держатся только массивы счётчиков
+    по пользователям. Сигналы не вызываются: счётчики считаются здесь,
+    ленты и поисковый индекс перестраивает вызывающий код.
+    """
+
+    def __init__(self, users=1000, groups=50, posts=10000, follows=20,
+                 comments=2, images=0.1, image_files=20, days=365,
+                 until=None, seed=0, batch_size=2000, alpha=1.1):
+        self.rng = random.Random(seed)
+        self.users = users
+        self.groups = groups
+        self.posts = posts
+        self.follows = follows
+        self.comments = comments
+        self.images = images
+        self.image_files = image_files
+        self.until = until or timezone.now().replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        self.since = self.until - dt.timedelta(days=days)
+        self.batch_size = batch_size
+        self.alpha = alpha
+
+    def run(self):
+        self.user_id = next_id(User)
+        self.group_id = next_id(Group)
+        self.posts_count = array('l', [0]) * self.users
+        self.followers_count = array('l', [0]) * self.users
+        self.following_count = array('l', [0]) * self.users
+        self.popular = PowerLaw(self.rng, self.users, self.alpha)
+        self.active = PowerLaw(self.rng, self.users, self.alpha)
+        self.writers = array('l', range(self.users))
+        self.rng.shuffle(self.writers)
+        counts = {}
+        counts['users'] = self.create_users()
+        counts['groups'] = self.create_groups()
+        counts['follows'] = self.create_follows()
+        with explicit_dates():
+            counts['posts'], counts['comments'] = self.create_posts()
+        self.create_stats()
+        return counts
+
+    def create_users(self):
+        batch = Batch(User, self.batch_size)
+        for number in range(self.users):
+            pk = self.user_id + number
+            batch.add(User(pk=pk, username=f'dataset{pk}', password='!',
+                           first_name=f'Пользователь {pk}'))
+        batch.flush()
+        return batch.count
+
+    def create_groups(self):
+        batch = Batch(Group, self.batch_size)
+        for number in range(self.groups):
+            pk = self.group_id + number
+            batch.add(Group(pk=pk, slug=f'dataset-{pk}',
+                            title=f'Группа {pk}',
+                            description=text(self.rng, 20)))
+        batch.flush()
+        return batch.count
+
+    def create_follows(self):
+        batch = Batch(Follow, self.batch_size)
+        for user in range(self.users):
+            wanted = min(heavy_tail(self.rng, self.follows), self.users - 1)
+            authors = set()
+            for _ in range(wanted * 3):
+                if len(authors) >= wanted:
+                    break
+                author = self.popular.pick()
+                if author != user:
+                    authors.add(author)
+            for author in sorted(authors):
+                batch.add(Follow(user_id=self.user_id + user,
+                                 author_id=self.user_id + author))
+                self.followers_count[author] += 1
+            self.following_count[user] += len(authors)
+        batch.flush()
+        return batch.count
+
+    def bursts(self):
+        """(автор, время) постов: серии одного автора с паузами."""
+        span = (self.until - self.since).total_seconds()
+        produced = 0
+        while produced < self.posts:
+            author = self.writers[self.active.pick()]
+            size = min(1 + int(self.rng.expovariate(1 / 3)),
+                       self.posts - produced)
+            moment = self.since + dt.timedelta(
+                seconds=self.rng.random() * span
+            )
+            for _ in range(size):
+                yield author, min(moment, self.until)
+                moment += dt.timedelta(
+                    seconds=self.rng.expovariate(1 / 600)
+                )
+            produced += size
+
+    def create_posts(self):
+        post_id = next_id(Post)
+        comment_id = next_id(Comment)
+        groups = PowerLaw(self.rng, self.groups, 1.0) if self.groups else None
+        images = make_images(self.rng, self.image_files) if (
+            self.images and self.image_files) else []
+        posts = Batch(Post, self.batch_size)
+        comments = Batch(Comment, self.batch_size, before=posts)
+        for author, moment in self.bursts():
+            count = min(heavy_tail(self.rng, self.comments, 1.2), 500)
+            group = None
+            if groups and self.rng.random() < 0.6:
+                group = self.group_id + groups.pick()
+            image = None
+            if images and self.rng.random() < self.images:
+                image = self.rng.choice(images)
+            posts.add(Post(
+                pk=post_id, author_id=self.user_id + author,
+                group_id=group, text=text(self.rng, 30), pub_date=moment,
+                image=image, comment_count=count,
+            ))
+            self.posts_count[author] += 1
+            for _ in range(count):
+                created = moment + dt.timedelta(
+                    seconds=self.rng.expovariate(1 / 3600)
+                )
+                comments.add(Comment(
+                    pk=comment_id, post_id=post_id,
+                    author_id=self.user_id + self.writers[
+                        self.active.pick()],
+                    text=text(self.rng, 10),
+                    created=min(created, self.until),
+                ))
+                comment_id += 1
+            post_id += 1
+        comments.flush()
+        return posts.count, comments.count
+
+    def create_stats(self):
+        batch = Batch(UserStats, self.batch_size)
+        for user in range(self.users):
+            batch.add(UserStats(
+                user_id=self.user_id + user,
+                posts_count=self.posts_count[user],
+                followers_count=self.followers_count[user],
+                following_count=self.following_count[user],
+            ))
+        batch.flush()
@@ -0,0 +1,82 @@
+import asyncio
+import threading
+
+POSTS = 'posts'
+QUEUE_SIZE = 100
+
+
+def group(group_id):
+    return f'group:{group_id}'
+
+
+def author(author_id):
+    return f'author:{author_id}'
+
+
+def post_channels(author_id, group_id):
+    channels = [POSTS, author(author_id)]
+    if group_id is not None:
+        channels.append(group(group_id))
+    return channels
+
+
+class Subscription:
+    def __init__(self, channels, loop):
+        self.channels = frozenset(channels)
+        self.loop = loop
+        self.queue = asyncio.Queue(QUEUE_SIZE)
+        # Подписчик не успевает читать: поток закрывается, клиент
+        # переподключится с Last-Event-ID и получит пропущенное из базы.
+        self.lagging = False
+
+    def put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.lagging = True
+
+
+class Bus:
+    """Pub/sub внутри процесса: события из потоков WSGI в циклы asyncio.
+
+    Подписки разложены по каналам, публикация обходит только подписчиков
+    каналов события.
+    """
+
+    def __init__(self):
+        self._channels = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, channels):
+        subscription = Subscription(channels, asyncio.get_running_loop())
+        with self._lock:
+            for channel in subscription.channels:
+                self._channels.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._channels.get(channel, set())
+                subscribers.discard(subscription)
+                if not subscribers:
+                    self._channels.pop(channel, None)
+
+    def publish(self, event, channels):
+        with self._lock:
+            targets = set()
+            for channel in channels:
+                targets |= self._channels.get(channel, set())
+        for subscription in targets:
+            subscription.loop.call_soon_threadsafe(subscription.put, event)
+        return len(targets)
+
+
+bus = Bus()
+
+
+def publish_post(post):
+    """Сообщает подписчикам о новом посте: id, автор и группа."""
+    event = {'id': post.id, 'author': post.author_id,
+             'group': post.group_id}
+    return bus.publish(event, post_channels(post.author_id, post.group_id))
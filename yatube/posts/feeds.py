@@ -0,0 +1,37 @@
+from django.db.models import Prefetch
+
+from .models import Comment, ImageVariant
+
+
+def for_feed(posts):
+    """Посты со всем, что нужно карточке, без запросов на каждую карточку.
+
+    Число комментариев хранится в самом посте (Post.comment_count),
+    варианты картинок для <picture> достаются одним запросом на страницу.
+    """
+    # Без сортировки: ORDER BY по всем постам страницы не идёт по индексу,
+    # варианты упорядочивает variants.picture().
+    return posts.select_related('author', 'group').prefetch_related(
+        Prefetch('image_variants', ImageVariant.objects.order_by())
+    )
+
+
+def latest_comments(post_ids, limit):
+    """Последние limit комментариев каждого поста одним запросом.
+
+    У комментариев есть атрибут author__username, автор не загружается.
+    """
+    if not post_ids:
+        return []
+    placeholders = ', '.join(['%s'] * len(post_ids))
+    return list(Comment.objects.raw(
+        'SELECT comment.*, auth_user.username AS author__username '
+        'FROM (SELECT posts_comment.*, ROW_NUMBER() OVER ('
+        '  PARTITION BY post_id ORDER BY created DESC, id DESC'
+        ') AS position FROM posts_comment'
+        f' WHERE post_id IN ({placeholders})) AS comment '
+        'INNER JOIN auth_user ON auth_user.id = comment.author_id '
+        'WHERE comment.position <= %s '
+        'ORDER BY comment.post_id, comment.position',
+        [*post_ids, limit]
+    ))
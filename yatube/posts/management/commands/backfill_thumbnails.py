@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Exists, OuterRef
+
+from posts import thumbnails
+from posts.models import ImageVariant, Post
+
+
+class Command(BaseCommand):
+    help = ('Ставит в очередь миниатюры и варианты для уже загруженных '
+            'картинок')
+
+    def handle(self, *args, **options):
+        queued = 0
+        posts = Post.objects.exclude(image='').exclude(
+            image__isnull=True
+        ).annotate(has_variants=Exists(ImageVariant.objects.filter(
+            post=OuterRef('pk'), source=OuterRef('image')
+        )))
+        for post in posts.only('id', 'image').iterator():
+            if (not post.has_variants
+                    or thumbnails.ready_url(post.image) is None):
+                thumbnails.enqueue(post)
+                queued += 1
+        self.stdout.write(f'Поставлено в очередь: {queued}')
@@ -0,0 +1,151 @@
+import json
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from socketserver import ThreadingMixIn
+from urllib.error import HTTPError
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import WSGIRequestHandler, WSGIServer
+from django.core.wsgi import get_wsgi_application
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework_simplejwt.tokens import AccessToken
+
+from posts.models import Post, User
+
+MODES = {
+    'plain': {'ENGINE': 'django.db.backends.sqlite3', 'CONN_MAX_AGE': 0},
+    'tuned': {'ENGINE': 'yatube.db', 'CONN_MAX_AGE': 600},
+}
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class PooledWSGIServer(ThreadingMixIn, WSGIServer):
+    """Запросы обслуживает пул потоков, как у gunicorn --threads:
+    соединения с базой живут в потоках между запросами."""
+
+    def __init__(self, *args, threads, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool = ThreadPoolExecutor(threads)
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self.process_request_thread, request,
+                         client_address)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown()
+
+
+class Command(BaseCommand):
+    help = ('Смешанная нагрузка чтения и записи на многопоточный сервер: '
+            'обычный SQLite против yatube.db (WAL, прагмы, постоянные '
+            'соединения). Работает на копии базы.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=10)
+        parser.add_argument('--clients', type=int, default=16)
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--writes', type=float, default=0.2,
+                            help='Доля запросов на запись')
+        parser.add_argument('--modes', nargs='+', choices=MODES,
+                            default=list(MODES))
+
+    def handle(self, *args, **options):
+        source = settings.DATABASES[DEFAULT_DB_ALIAS]['NAME']
+        if not os.path.exists(source):
+            raise CommandError(f'Нет базы {source}, сначала migrate')
+        directory = tempfile.mkdtemp()
+        try:
+            database = os.path.join(directory, 'benchmark.sqlite3')
+            with sqlite3.connect(source) as src, \
+                    sqlite3.connect(database) as dst:
+                src.backup(dst)
+            # Лимиты частоты запросов мерили бы себя, а не базу.
+            settings.RATELIMIT_RATES = {}
+            settings.RATELIMIT_STORE = os.path.join(directory, 'ratelimit')
+            for mode in options['modes']:
+                self.configure(database, mode)
+                result = self.run(options)
+                self.report(mode, result, options['seconds'])
+        finally:
+            connections.close_all()
+            shutil.rmtree(directory, ignore_errors=True)
+
+    @staticmethod
+    def configure(database, mode):
+        connections.close_all()
+        if mode == 'plain':
+            # WAL запоминается в файле базы, обычный режим - вернуть явно.
+            with sqlite3.connect(database) as db:
+                db.execute('PRAGMA journal_mode = DELETE')
+        config = connections.databases[DEFAULT_DB_ALIAS]
+        config.update(MODES[mode], NAME=database, OPTIONS={})
+        del connections[DEFAULT_DB_ALIAS]
+
+    def run(self, options):
+        user, _ = User.objects.get_or_create(username='benchmark')
+        post = Post.objects.create(text='benchmark', author=user)
+        token = str(AccessToken.for_user(user))
+        connections.close_all()
+        server = PooledWSGIServer(('127.0.0.1', 0), QuietHandler,
+                                  threads=options['threads'])
+        server.set_app(get_wsgi_application())
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f'http://127.0.0.1:{server.server_address[1]}'
+        stop = time.monotonic() + options['seconds']
+        comment = urllib.request.Request(
+            f'{base}/api/v1/posts/{post.id}/comments/',
+            data=json.dumps({'text': 'benchmark'}).encode(),
+            headers={'Authorization': f'Bearer {token}',
+                     'Content-Type': 'application/json'},
+        )
+
+        def client():
+            stats = {'read': [], 'write': [], 'errors': 0}
+            while time.monotonic() < stop:
+                write = random.random() < options['writes']
+                request = comment if write else f'{base}/'
+                started = time.perf_counter()
+                try:
+                    urllib.request.urlopen(request, timeout=30).read()
+                except (HTTPError, OSError):
+                    stats['errors'] += 1
+                    continue
+                stats['write' if write else 'read'].append(
+                    time.perf_counter() - started
+                )
+            return stats
+
+        with ThreadPoolExecutor(options['clients']) as pool:
+            results = list(pool.map(lambda _: client(),
+                                    range(options['clients'])))
+        server.shutdown()
+        server.server_close()
+        connections.close_all()
+        return {
+            'read': sorted(sum((item['read'] for item in results), [])),
+            'write': sorted(sum((item['write'] for item in results), [])),
+            'errors': sum(item['errors'] for item in results),
+        }
+
+    def report(self, mode, result, seconds):
+        parts = []
+        for kind in ('read', 'write'):
+            times = result[kind]
+            p95 = times[int(len(times) * 0.95)] * 1000 if times else 0
+            parts.append(f'{kind} {len(times) / seconds:.0f}/с '
+                         f'p95 {p95:.0f} мс')
+        parts.append(f'ошибок {result["errors"]}')
+        self.stdout.write(f'{mode}: ' + ', '.join(parts))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = 'Заново строит полнотекстовый индекс постов'
+
+    def handle(self, *args, **options):
+        if not search.available():
+            raise CommandError('Полнотекстовый индекс есть только в SQLite')
+        search.create_index()
+        with transaction.atomic():
+            indexed = search.rebuild()
+        self.stdout.write(f'Проиндексировано постов: {indexed}')
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import timeline
+
+
+class Command(BaseCommand):
+    help = 'Заново раскладывает посты по лентам подписчиков'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            created = timeline.rebuild()
+        self.stdout.write(f'Записей в лентах: {created}')
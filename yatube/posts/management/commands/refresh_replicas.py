@@ -0,0 +1,26 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from yatube import replicas
+
+
+class Command(BaseCommand):
+    help = ('Обновляет реплики для чтения снимком основной базы; '
+            'с --interval - раз в interval секунд')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0)
+
+    def handle(self, *args, **options):
+        while True:
+            for alias in settings.DATABASE_REPLICAS:
+                started = time.monotonic()
+                replicas.refresh(alias)
+                self.stdout.write(
+                    f'{alias}: {time.monotonic() - started:.2f} с'
+                )
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,25 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+
+
+class Command(BaseCommand):
+    help = 'Создаёт миниатюры картинок постов из очереди задач'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--poll', type=float, default=1.0,
+                            help='Пауза между проверками пустой очереди')
+        parser.add_argument('--once', action='store_true',
+                            help='Выйти, когда очередь опустеет')
+
+    def handle(self, *args, **options):
+        with ThreadPoolExecutor(options['workers']) as pool:
+            futures = [
+                pool.submit(thumbnails.work, options['once'], options['poll'])
+                for _ in range(options['workers'])
+            ]
+        done = sum(future.result() for future in futures)
+        self.stdout.write(f'Создано миниатюр: {done}')
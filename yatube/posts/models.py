@@ -1,10 +1,24 @@
-from django.db import models
+from django.db import models, router, transaction
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
 
-class Group(models.Model):
+class LoggedModel(models.Model):
+    """Строка и её запись в журнале изменений (Change) сохраняются одной
+    транзакцией: журнал пишут обработчики post_save."""
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(type(self),
+                                                           instance=self)
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+
+
+class Group(LoggedModel):
     title = models.CharField('', max_length=200)
     slug = models.SlugField(unique=True, default='')
     description = models.TextField()
@@ -13,20 +27,31 @@ class Group(models.Model):
         return self.title
 
 
-class Post(models.Model):
+class Post(LoggedModel):
     text = models.TextField()
     pub_date = models.DateTimeField('date published', auto_now_add=True)
+    # Отдельные индексы по author и group покрывают составные ниже.
     author = models.ForeignKey(
-        User, on_delete=models.CASCADE, related_name='posts'
+        User, on_delete=models.CASCADE, related_name='posts', db_index=False
     )
     group = models.ForeignKey(
         Group, on_delete=models.SET_NULL, related_name='posts', blank=True,
-        null=True
+        null=True, db_index=False
     )
     image = models.ImageField(upload_to='posts/', blank=True, null=True)
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
 
     class Meta:
         ordering = ['-pub_date']
+        # Ленты сортируются по (-pub_date, -id): id замыкает ключ курсора.
+        indexes = [
+            models.Index(fields=['-pub_date', '-id'],
+                         name='post_date_idx'),
+            models.Index(fields=['author', '-pub_date', '-id'],
+                         name='post_author_date_idx'),
+            models.Index(fields=['group', '-pub_date', '-id'],
+                         name='post_group_date_idx'),
+        ]
 
     def __str__(self) -> str:
         text = self.text
@@ -35,9 +60,10 @@ class Post(models.Model):
         return text
 
 
-class Comment(models.Model):
+class Comment(LoggedModel):
     post = models.ForeignKey(
-        Post, on_delete=models.CASCADE, related_name='comments'
+        Post, on_delete=models.CASCADE, related_name='comments',
+        db_index=False
     )
     author = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name='comments'
@@ -47,16 +73,122 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ['-created']
+        indexes = [
+            models.Index(fields=['post', '-created', '-id'],
+                         name='comment_post_created_idx'),
+        ]
 
 
-class Follow(models.Model):
+class Follow(LoggedModel):
+    # Отдельные индексы по полям не нужны: их покрывают составные
+    # (user, author) и (author, user) ниже.
     user = models.ForeignKey(User, on_delete=models.CASCADE,
-                             related_name='follower')
+                             related_name='follower', db_index=False)
     author = models.ForeignKey(User, on_delete=models.CASCADE,
-                               related_name='following')
+                               related_name='following', db_index=False)
 
     class Meta:
         constraints = [
             models.UniqueConstraint(fields=('user', 'author'),
                                     name='unique_list')
-        ]
\ No newline at end of file
+        ]
+        indexes = [
+            models.Index(fields=['author', 'user'],
+                         name='follow_author_user_idx'),
+        ]
+
+
+class ImageVariant(models.Model):
+    post = models.ForeignKey(Post, on_delete=models.CASCADE,
+                             related_name='image_variants')
+    source = models.CharField(max_length=100)
+    format = models.CharField(max_length=10)
+    width = models.PositiveSmallIntegerField()
+    height = models.PositiveSmallIntegerField()
+    image = models.ImageField(upload_to='posts/variants/')
+
+    class Meta:
+        ordering = ['format', 'width']
+        constraints = [
+            models.UniqueConstraint(fields=('post', 'format', 'width'),
+                                    name='unique_image_variant')
+        ]
+
+
+class ThumbnailJob(models.Model):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (FAILED, 'Ошибка'),
+    )
+
+    post = models.ForeignKey(Post, on_delete=models.CASCADE,
+                             related_name='thumbnail_jobs')
+    status = models.CharField(max_length=10, choices=STATUSES,
+                              default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    started = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'id'],
+                         name='thumbnail_job_status_idx'),
+        ]
+
+
+class UserStats(models.Model):
+    user = models.OneToOneField(User, on_delete=models.CASCADE,
+                                primary_key=True, related_name='stats')
+    posts_count = models.PositiveIntegerField(default=0)
+    followers_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE,
+                             related_name='timeline')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE,
+                             related_name='timeline_entries')
+    author = models.ForeignKey(User, on_delete=models.CASCADE,
+                               related_name='+')
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-pub_date', '-id']
+        constraints = [
+            models.UniqueConstraint(fields=('user', 'post'),
+                                    name='unique_timeline_entry')
+        ]
+        indexes = [
+            models.Index(fields=['user', 'pub_date'],
+                         name='timeline_user_date_idx'),
+            models.Index(fields=['user', 'author'],
+                         name='timeline_user_author_idx'),
+        ]
+
+
+class Change(models.Model):
+    """Журнал изменений только на добавление; id - курсор синхронизации."""
+    UPSERT = 'upsert'
+    DELETE = 'delete'
+    ACTIONS = (
+        (UPSERT, 'Создан или изменён'),
+        (DELETE, 'Удалён'),
+    )
+
+    model = models.CharField(max_length=20)
+    object_id = models.PositiveIntegerField()
+    action = models.CharField(max_length=10, choices=ACTIONS)
+    # Чьё это изменение, если оно видно не всем (подписки); не внешний
+    # ключ, чтобы удаление пользователя не стирало журнал.
+    owner_id = models.PositiveIntegerField(blank=True, null=True)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
@@ -0,0 +1,194 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from functools import partial
+
+from django.conf import settings
+from django.core.exceptions import (
+    FieldDoesNotExist,
+    FieldError,
+    ValidationError,
+)
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.http import urlencode
+
+DEFAULT_KEYS = ('-pub_date', '-id')
+CURSOR_PARAMS = ('page', 'after', 'before')
+
+
+def encode_cursor(values):
+    data = json.dumps(values, default=lambda value: value.isoformat())
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        data = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(data.decode())
+        if not isinstance(values, list):
+            return None
+        return [
+            parse_datetime(value) or value if isinstance(value, str)
+            else value
+            for value in values
+        ]
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+
+class KeysetPaginator(Paginator):
+    """Постраничный вывод по ключу сортировки вместо OFFSET.
+
+    Страница ищется по значениям ключей последней (after) или первой
+    (before) записи соседней страницы, поэтому любая страница стоит
+    столько же, сколько первая, и COUNT(*) не нужен. Ключи берутся из
+    order_by запроса, последний ключ должен быть уникальным.
+    """
+
+    def __init__(self, object_list, per_page, keys=None, **kwargs):
+        keys = keys or tuple(object_list.query.order_by) or DEFAULT_KEYS
+        super().__init__(object_list.order_by(*keys), per_page, **kwargs)
+        self.keys = keys
+
+    def page_for(self, params):
+        if params.get('after'):
+            values = self._values(params['after'])
+            if values is not None:
+                return self._seek(values, forward=True)
+        if params.get('before'):
+            values = self._values(params['before'])
+            if values is not None:
+                return self._seek(values, forward=False)
+        if params.get('page'):
+            return self._numbered_page(params['page'])
+        rows = list(self.object_list[:self.per_page + 1])
+        return self._keyset_page(rows[:self.per_page],
+                                 has_previous=False,
+                                 has_next=len(rows) > self.per_page)
+
+    def cursor(self, obj):
+        # Строки из values() - словари, остальное - объекты моделей.
+        get = obj.get if isinstance(obj, dict) else partial(getattr, obj)
+        return encode_cursor([get(key.lstrip('-')) for key in self.keys])
+
+    def exists(self, token):
+        """Есть ли запись с ключами курсора."""
+        values = self._values(token)
+        return values is not None and self.object_list.filter(**{
+            key.lstrip('-'): value for key, value in zip(self.keys, values)
+        }).exists()
+
+    def _values(self, token):
+        """Значения курсора, приведённые к типам ключей, или None.
+
+        Курсор приходит от клиента: подделанный считается испорченным,
+        а не доходит до запроса.
+        """
+        values = decode_cursor(token)
+        if values is None or len(values) != len(self.keys):
+            return None
+        try:
+            return [
+                self._clean(key.lstrip('-'), value)
+                for key, value in zip(self.keys, values)
+            ]
+        except (ValidationError, TypeError, ValueError):
+            return None
+
+    def _clean(self, name, value):
+        if value is None:
+            raise ValueError(name)
+        field = self._field(name)
+        if field is not None:
+            value = field.to_python(value)
+        elif not isinstance(value, (str, int, float)):
+            raise TypeError(name)
+        if (settings.USE_TZ and isinstance(value, datetime)
+                and timezone.is_naive(value)):
+            value = timezone.make_aware(value)
+        return value
+
+    def _field(self, name):
+        query = self.object_list.query
+        if name in query.annotations:
+            try:
+                return query.annotations[name].output_field
+            except FieldError:
+                return None
+        try:
+            return self.object_list.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None
+
+    def _seek(self, values, forward):
+        keys = self.keys if forward else [
+            key[1:] if key.startswith('-') else '-' + key for key in self.keys
+        ]
+        rows = list(
+            self.object_list.order_by(*keys).filter(
+                self._seek_filter(keys, values)
+            )[:self.per_page + 1]
+        )
+        more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if forward:
+            return self._keyset_page(rows, has_previous=True, has_next=more)
+        return self._keyset_page(rows[::-1], has_previous=more, has_next=True)
+
+    @staticmethod
+    def _seek_filter(keys, values):
+        # (k1, k2) > (v1, v2) раскрывается в k1 >= v1 AND (k1 > v1 OR
+        # k2 > v2): первое условие даёт SQLite диапазон по индексу.
+        lookups = [
+            (key.lstrip('-'), 'lt' if key.startswith('-') else 'gt')
+            for key in keys
+        ]
+        name, op = lookups[0]
+        bound = Q(**{f'{name}__{op}e': values[0]})
+        seek = Q()
+        for position, (name, op) in enumerate(lookups):
+            step = Q(**{f'{name}__{op}': values[position]})
+            for equal_name, value in zip(keys[:position], values):
+                step &= Q(**{equal_name.lstrip('-'): value})
+            seek |= step
+        return bound & seek
+
+    def _keyset_page(self, rows, has_previous, has_next):
+        page = self._get_page(rows, None, self)
+        page.previous_cursor = (
+            self.cursor(rows[0]) if has_previous and rows else None
+        )
+        page.next_cursor = self.cursor(rows[-1]) if has_next and rows else None
+        return page
+
+    def _numbered_page(self, number):
+        page = self.get_page(number)
+        rows = page.object_list = list(page.object_list)
+        page.previous_cursor = (
+            self.cursor(rows[0]) if page.has_previous() and rows else None
+        )
+        page.next_cursor = (
+            self.cursor(rows[-1]) if page.has_next() and rows else None
+        )
+        return page
+
+
+def paginate(request, object_list):
+    page = KeysetPaginator(object_list, settings.OBJECTS_COUNT).page_for(
+        request.GET
+    )
+    params = [
+        (key, value) for key, value in request.GET.items()
+        if key not in CURSOR_PARAMS
+    ]
+    page.previous_query = page.previous_cursor and urlencode(
+        params + [('before', page.previous_cursor)]
+    )
+    page.next_query = page.next_cursor and urlencode(
+        params + [('after', page.next_cursor)]
+    )
+    return page
@@ -0,0 +1,109 @@
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+from .models import Post
+
+TABLE = 'posts_post_fts'
+KEYS = ('rank', 'id')
+WORD = re.compile(r'\w+')
+
+
+def available():
+    return connection.vendor == 'sqlite'
+
+
+def create_index(using=None, **kwargs):
+    """Создаёт таблицу FTS5 и заполняет её, если её ещё нет."""
+    if not available():
+        return
+    with connection.cursor() as cursor:
+        exists = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+            (TABLE,)
+        ).fetchone()
+        if exists:
+            return
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE {TABLE} USING fts5('
+            "text, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+    rebuild()
+
+
+def rebuild():
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE}')
+        cursor.execute(f'INSERT INTO {TABLE} (rowid, text) '
+                       'SELECT id, text FROM posts_post')
+        return cursor.execute(f'SELECT count(*) FROM {TABLE}').fetchone()[0]
+
+
+def index_post(post):
+    if not available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', (post.pk,))
+        cursor.execute(f'INSERT INTO {TABLE} (rowid, text) VALUES (%s, %s)',
+                       (post.pk, post.text))
+
+
+def index_posts(posts):
+    if not available():
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f'INSERT OR REPLACE INTO {TABLE} (rowid, text) '
+                           'VALUES (%s, %s)',
+                           [(post.pk, post.text) for post in posts])
+
+
+def remove_post(post_id):
+    if not available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', (post_id,))
+
+
+def match_query(text):
+    """Строка запроса FTS5: все слова обязательны, каждое как префикс.
+
+    Слова берутся в кавычки, поэтому операторы и скобки из ввода
+    пользователя не ломают запрос.
+    """
+    return ' '.join(f'"{word}"*' for word in WORD.findall(text.lower()))
+
+
+def search(text, posts=None):
+    """Посты по запросу с полем rank: чем меньше, тем релевантнее.
+
+    Ответ на запрос даёт индекс FTS5, строки постов достаются по rowid.
+    """
+    posts = Post.objects.all() if posts is None else posts
+    query = match_query(text)
+    if not query:
+        return posts.none()
+    if not available():
+        for word in WORD.findall(text):
+            posts = posts.filter(text__icontains=word)
+        return posts.annotate(
+            rank=RawSQL('0.0', ())
+        ).order_by(*KEYS)
+    return posts.extra(
+        tables=[TABLE],
+        where=[f'{TABLE} MATCH %s', f'{TABLE}.rowid = posts_post.id'],
+        params=[query],
+    ).annotate(
+        rank=RawSQL(f'bm25({TABLE})', ())
+    ).order_by(*KEYS)
+
+
+def matching_ids(text):
+    """Подзапрос id постов по запросу, для фильтра id__in."""
+    query = match_query(text)
+    if not query:
+        return Post.objects.none().values('id')
+    if not available():
+        return Post.objects.filter(text__icontains=text).values('id')
+    return RawSQL(f'SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s',
+                  (query,))
@@ -0,0 +1,181 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+
+from . import (archive, cards, changes, counters, events, search,
+               thumbnails, timeline, versions)
+from .bulk import bulk_created
+from .models import (Change, Comment, Follow, Group, ImageVariant, Post,
+                     User, UserStats)
+
+
+# Имя автора есть в карточках его постов и в заголовке его архива.
+NAME_FIELDS = ('username', 'first_name', 'last_name')
+
+
+@receiver(pre_save, sender=User)
+def user_saving(sender, instance, update_fields=None, **kwargs):
+    # Вход сохраняет только last_login: тогда старое имя не читается.
+    instance._renamed = False
+    if instance.pk is None or (update_fields is not None and not set(
+            update_fields) & set(NAME_FIELDS)):
+        return
+    names = User.objects.filter(pk=instance.pk).values_list(
+        *NAME_FIELDS).first()
+    instance._renamed = names is not None and names != tuple(
+        getattr(instance, name) for name in NAME_FIELDS
+    )
+
+
+@receiver(post_save, sender=User)
+def create_stats(sender, instance, created, **kwargs):
+    if created:
+        UserStats.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=User)
+def user_renamed(sender, instance, **kwargs):
+    if getattr(instance, '_renamed', False):
+        cards.bump_many(instance.posts.values_list('id', flat=True))
+        archive.bump_all()
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    changes.record(instance, Change.UPSERT)
+    cards.bump(instance.pk)
+    if not created:
+        archive.bump(instance.pub_date)
+    search.index_post(instance)
+    if instance.image and thumbnails.ready_url(instance.image) is None:
+        thumbnails.enqueue(instance)
+    if created:
+        counters.change_user(instance.author_id, posts_count=1)
+        timeline.fan_out(instance)
+        transaction.on_commit(lambda: events.publish_post(instance))
+
+
+@receiver(bulk_created, sender=Post)
+def posts_created(sender, objects, **kwargs):
+    changes.record_objects(objects)
+    versions.bump(versions.POSTS)
+    search.index_posts(objects)
+    thumbnails.enqueue_many(objects)
+    for author_id, count in Counter(
+            post.author_id for post in objects).items():
+        counters.change_user(author_id, posts_count=count)
+    timeline.fan_out_many(objects)
+
+    def publish():
+        for post in objects:
+            events.publish_post(post)
+    transaction.on_commit(publish)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    changes.record(instance, Change.DELETE)
+    cards.bump(instance.pk)
+    archive.bump(instance.pub_date)
+    search.remove_post(instance.pk)
+    counters.change_user(instance.author_id, posts_count=-1)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    changes.record(instance, Change.UPSERT)
+    cards.bump(instance.post_id)
+    versions.bump(versions.comments(instance.post_id))
+    if created:
+        counters.change_comments(instance.post_id, 1)
+        # У поста изменился comment_count.
+        changes.record_many(Post, [instance.post_id])
+
+
+@receiver(bulk_created, sender=Comment)
+def comments_created(sender, objects, **kwargs):
+    added = Counter(comment.post_id for comment in objects)
+    changes.record_objects(objects)
+    cards.bump_many(added)
+    versions.bump(*map(versions.comments, added))
+    for post_id, count in added.items():
+        counters.change_comments(post_id, count)
+    changes.record_many(Post, added)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    changes.record(instance, Change.DELETE)
+    cards.bump(instance.post_id)
+    versions.bump(versions.comments(instance.post_id))
+    counters.change_comments(instance.post_id, -1)
+    changes.record_many(Post, [instance.post_id])
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    changes.record(instance, Change.UPSERT)
+    versions.bump(versions.FOLLOWS)
+    if created:
+        counters.change_user(instance.author_id, followers_count=1)
+        counters.change_user(instance.user_id, following_count=1)
+        timeline.backfill(instance.user_id, instance.author_id)
+        timeline.rebalance(instance.author_id, 1)
+
+
+@receiver(bulk_created, sender=Follow)
+def follows_created(sender, objects, **kwargs):
+    changes.record_objects(objects)
+    versions.bump(versions.FOLLOWS)
+    followers = Counter(follow.author_id for follow in objects)
+    following = Counter(follow.user_id for follow in objects)
+    for author_id, count in followers.items():
+        counters.change_user(author_id, followers_count=count)
+    for user_id, count in following.items():
+        counters.change_user(user_id, following_count=count)
+    timeline.backfill_many(objects)
+    for author_id, count in followers.items():
+        timeline.rebalance(author_id, count)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    changes.record(instance, Change.DELETE)
+    versions.bump(versions.FOLLOWS)
+    counters.change_user(instance.author_id, followers_count=-1)
+    counters.change_user(instance.user_id, following_count=-1)
+    timeline.prune(instance.user_id, instance.author_id)
+    timeline.rebalance(instance.author_id, -1)
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, **kwargs):
+    changes.record(instance, Change.UPSERT)
+    versions.bump(versions.GROUPS)
+    if not created:
+        # Название группы есть в карточках её постов.
+        cards.bump_many(instance.posts.values_list('id', flat=True))
+        archive.bump_all()
+
+
+@receiver(pre_delete, sender=Group)
+def group_deleting(sender, instance, **kwargs):
+    # Посты группы обнуляют group через UPDATE, без своих сигналов.
+    post_ids = list(instance.posts.values_list('id', flat=True))
+    changes.record_many(Post, post_ids)
+    cards.bump_many(post_ids)
+    archive.bump_all()
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    changes.record(instance, Change.DELETE)
+    versions.bump(versions.GROUPS)
+
+
+@receiver(post_delete, sender=ImageVariant)
+def variant_deleted(sender, instance, **kwargs):
+    transaction.on_commit(lambda: instance.image.delete(save=False))
@@ -0,0 +1,144 @@
+import asyncio
+import json
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.db import close_old_connections
+from django.http import HttpRequest
+from django.utils.module_loading import import_string
+
+from . import events
+from .models import Follow, Group, Post
+
+HEARTBEAT = 15
+REPLAY_LIMIT = 100
+HEADERS = [
+    (b'content-type', b'text/event-stream; charset=utf-8'),
+    (b'cache-control', b'no-cache'),
+    (b'x-accel-buffering', b'no'),
+]
+
+
+def _session_user(scope):
+    cookies = SimpleCookie()
+    for name, value in scope.get('headers', []):
+        if name == b'cookie':
+            cookies.load(value.decode('latin-1'))
+    request = HttpRequest()
+    engine = import_string(settings.SESSION_ENGINE)
+    morsel = cookies.get(settings.SESSION_COOKIE_NAME)
+    request.session = engine.SessionStore(morsel and morsel.value)
+    return get_user(request)
+
+
+def _resolve(scope, feed):
+    """Каналы и фильтр постов для ленты; None - ленты нет или нет доступа."""
+    close_old_connections()
+    if feed == events.POSTS:
+        return [events.POSTS], {}
+    if feed.startswith('group:'):
+        group = Group.objects.filter(slug=feed[len('group:'):]).first()
+        if group is None:
+            return None
+        return [events.group(group.id)], {'group_id': group.id}
+    if feed == 'follow':
+        user = _session_user(scope)
+        if not user.is_authenticated:
+            return None
+        authors = list(Follow.objects.filter(user=user)
+                       .values_list('author_id', flat=True))
+        return ([events.author(pk) for pk in authors],
+                {'author_id__in': authors})
+    return None
+
+
+def _missed(filters, last_id):
+    close_old_connections()
+    return list(
+        Post.objects.filter(id__gt=last_id, **filters).order_by('id')
+        .values('id', 'author_id', 'group_id')[:REPLAY_LIMIT]
+    )
+
+
+def _last_event_id(scope, params):
+    value = dict(scope.get('headers', [])).get(b'last-event-id', b'')
+    value = value.decode() or params.get('last_id', [''])[0]
+    return int(value) if value.isdigit() else None
+
+
+def _message(event):
+    return (f'id: {event["id"]}\nevent: new_post\n'
+            f'data: {json.dumps(event)}\n\n').encode()
+
+
+async def _respond(send, status, body):
+    await send({'type': 'http.response.start', 'status': status,
+                'headers': [(b'content-type', b'text/plain')]})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def stream(scope, receive, send):
+    """SSE: id новых постов ленты ?feed=posts|group:<slug>|follow.
+
+    Подписка оформляется до чтения пропущенного из базы, так что между
+    повтором по Last-Event-ID и живыми событиями ничего не теряется.
+    """
+    params = parse_qs(scope.get('query_string', b'').decode())
+    feed = params.get('feed', [events.POSTS])[0]
+    resolved = await sync_to_async(_resolve)(scope, feed)
+    if resolved is None:
+        return await _respond(send, 404, b'Unknown feed')
+    channels, filters = resolved
+    subscription = events.bus.subscribe(channels)
+    try:
+        await send({'type': 'http.response.start', 'status': 200,
+                    'headers': HEADERS})
+        await send({'type': 'http.response.body',
+                    'body': b'retry: 5000\n\n', 'more_body': True})
+        last_id = _last_event_id(scope, params)
+        if last_id is not None:
+            for row in await sync_to_async(_missed)(filters, last_id):
+                event = {'id': row['id'], 'author': row['author_id'],
+                         'group': row['group_id']}
+                await send({'type': 'http.response.body',
+                            'body': _message(event), 'more_body': True})
+                last_id = row['id']
+        await _pump(subscription, receive, send, last_id or 0)
+    finally:
+        events.bus.unsubscribe(subscription)
+
+
+async def _disconnected(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def _pump(subscription, receive, send, last_id):
+    disconnect = asyncio.ensure_future(_disconnected(receive))
+    get = None
+    try:
+        while not subscription.lagging:
+            get = get or asyncio.ensure_future(subscription.queue.get())
+            done, _ = await asyncio.wait(
+                {get, disconnect}, timeout=HEARTBEAT,
+                return_when=asyncio.FIRST_COMPLETED
+            )
+            if disconnect in done:
+                return
+            if get in done:
+                event, get = get.result(), None
+                if event['id'] <= last_id:
+                    continue
+                body, last_id = _message(event), event['id']
+            else:
+                body = b': ping\n\n'
+            await send({'type': 'http.response.body', 'body': body,
+                        'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        disconnect.cancel()
+        if get is not None:
+            get.cancel()
@@ -0,0 +1,19 @@
+from django import template
+
+from .. import cards, thumbnails, variants
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_card(post):
+    return cards.render(post)
+
+
+@register.inclusion_tag('includes/card_picture.html')
+def card_picture(post):
+    picture = variants.picture(post)
+    if picture is not None:
+        # Миниатюра sorl не нужна: её поиск - лишний запрос на карточку.
+        return {'picture': picture}
+    return {'picture': None, 'fallback': thumbnails.card_url(post.image)}
@@ -0,0 +1,149 @@
+import datetime as dt
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from yatube import replicas
+
+from .. import archive, views
+from ..models import Group, Post, User
+from ..paginator import encode_cursor
+
+
+class ArchiveTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        march = timezone.make_aware(dt.datetime(2020, 3, 15))
+        for text, date in (('Мартовский', march),
+                           ('Апрельский', march + dt.timedelta(days=30))):
+            post = Post.objects.create(text=text, author=cls.user,
+                                       group=cls.group)
+            Post.objects.filter(pk=post.pk).update(pub_date=date)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_month_pages(self):
+        """Архивы сайта, группы и автора показывают посты своего месяца"""
+        pages = (
+            ('archive', []),
+            ('group_archive', ['group']),
+            ('profile_archive', ['TestUser']),
+        )
+        for name, args in pages:
+            with self.subTest(name=name):
+                response = self.guest_client.get(
+                    reverse(name, args=args + [2020, 3])
+                )
+                self.assertContains(response, 'Мартовский')
+                self.assertNotContains(response, 'Апрельский')
+                self.assertContains(
+                    response, reverse(name, args=args + [2020, 2])
+                )
+
+    def test_stored_forever(self):
+        """Закрытый месяц гость получает из кеша, кешируемым навсегда"""
+        url = reverse('archive', args=[2020, 3])
+        response = self.guest_client.get(url)
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn(f'max-age={archive.MAX_AGE}',
+                      response['Cache-Control'])
+        with self.assertNumQueries(0):
+            cached = self.guest_client.get(url)
+        self.assertEqual(cached.content, response.content)
+
+    def test_edit_renders_again(self):
+        """Правка поста месяца обновляет сохранённую страницу"""
+        url = reverse('archive', args=[2020, 3])
+        self.guest_client.get(url)
+        post = Post.objects.get(text='Мартовский')
+        post.text = 'Исправленный'
+        post.save()
+        self.assertContains(self.guest_client.get(url), 'Исправленный')
+
+    def test_not_stored(self):
+        """Открытый месяц и вошедший пользователь - обычная страница"""
+        now = timezone.localtime()
+        response = self.guest_client.get(
+            reverse('archive', args=[now.year, now.month])
+        )
+        self.assertNotIn('immutable', response.get('Cache-Control', ''))
+        client = Client()
+        client.force_login(self.user)
+        response = client.get(reverse('archive', args=[2020, 3]))
+        self.assertContains(response, 'Мартовский')
+        self.assertNotIn('immutable', response.get('Cache-Control', ''))
+
+    def test_bad_month(self):
+        """Несуществующий месяц - 404, /archive/ ведёт в прошлый месяц"""
+        response = self.guest_client.get('/archive/2020/13/')
+        self.assertEqual(response.status_code, 404)
+        year, month = archive.last_closed()
+        self.assertRedirects(
+            self.guest_client.get(reverse('archive_latest')),
+            reverse('archive', args=[year, month])
+        )
+
+    def assertStored(self, url, stored=True):
+        self.guest_client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.guest_client.get(url)
+        self.assertEqual(not queries, stored)
+        return response
+
+    def test_extra_params_redirect(self):
+        """Лишние параметры не создают новых записей в кеше"""
+        url = reverse('archive', args=[2020, 3])
+        self.assertRedirects(self.guest_client.get(url + '?x=1'), url)
+        cursor = encode_cursor(['2020-03-20T00:00:00+00:00', 1])
+        self.assertRedirects(
+            self.guest_client.get(url + f'?x=1&after={cursor}'),
+            url + f'?after={cursor}', fetch_redirect_response=False
+        )
+
+    def test_cursor_pages(self):
+        """Страница по курсору существующего поста хранится, по
+        выдуманному - рисуется каждый раз"""
+        url = reverse('archive', args=[2020, 3])
+        post = Post.objects.get(text='Мартовский')
+        real = encode_cursor([post.pub_date, post.id])
+        self.assertStored(url + f'?before={real}')
+        fake = encode_cursor([post.pub_date, post.id + 100])
+        self.assertStored(url + f'?before={fake}', stored=False)
+
+    def test_group_changes(self):
+        """Переименование и удаление группы обновляют страницы архива"""
+        url = reverse('group_archive', args=['group', 2020, 3])
+        self.assertStored(url)
+        self.group.title = 'Новое название'
+        self.group.save()
+        self.assertContains(self.guest_client.get(url), 'Новое название')
+        self.assertContains(
+            self.guest_client.get(reverse('archive', args=[2020, 3])),
+            'Новое название'
+        )
+        self.group.delete()
+        self.assertEqual(self.guest_client.get(url).status_code, 404)
+
+    def test_lagging_replica_not_stored(self):
+        """Страница, прочитанная из отставшей реплики, не запоминается"""
+        request = RequestFactory().get(reverse('archive', args=[2020, 3]))
+        request.user = AnonymousUser()
+        replicas._state.alias = 'default'
+        try:
+            response = views.archive_index(request, year=2020, month=3)
+        finally:
+            replicas._state.alias = None
+        self.assertContains(response, 'Мартовский')
+        with CaptureQueriesContext(connection) as queries:
+            self.guest_client.get(reverse('archive', args=[2020, 3]))
+        self.assertTrue(queries)
@@ -0,0 +1,57 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Post, User
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='TestAuthor')
+        cls.reader = User.objects.create_user(username='TestReader')
+        cls.post = Post.objects.create(text='Тестовый пост',
+                                       author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_not_modified(self):
+        """Повторный запрос без изменений получает 304 без запросов к базе"""
+        response = self.guest_client.get(reverse('index'))
+        etag = response['ETag']
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(reverse('index'),
+                                             HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_changes_invalidate(self):
+        """Новый пост, комментарий и подписка меняют ETag лент"""
+        index = reverse('index')
+        profile = reverse('profile', kwargs={'username': 'TestAuthor'})
+        changes = (
+            (index, lambda: Post.objects.create(text='Ещё',
+                                                author=self.author)),
+            (index, lambda: Comment.objects.create(
+                post=self.post, author=self.reader, text='Комментарий')),
+            (profile, lambda: Follow.objects.create(user=self.reader,
+                                                    author=self.author)),
+        )
+        for url, change in changes:
+            with self.subTest(url=url):
+                etag = self.guest_client.get(url)['ETag']
+                change()
+                response = self.guest_client.get(url,
+                                                 HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_per_user(self):
+        """Страница другого пользователя не считается той же"""
+        etag = self.guest_client.get(reverse('index'))['ETag']
+        client = Client()
+        client.force_login(self.reader)
+        response = client.get(reverse('index'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
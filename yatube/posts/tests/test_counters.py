@@ -0,0 +1,72 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import counters
+from ..models import Comment, Post, User, UserStats
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='TestAuthor')
+        cls.follower = User.objects.create_user(username='TestFollower')
+        cls.post = Post.objects.create(text='Test Text', author=cls.author)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.follower)
+
+    def test_comment_count(self):
+        """Счётчик комментариев растёт и уменьшается вместе с ними"""
+        self.authorized_client.post(reverse('add_comment', kwargs={
+            'username': self.author.username,
+            'post_id': self.post.id
+        }), {'text': 'Test Comment'})
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+        Comment.objects.get().delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 0)
+
+    def test_follow_counts(self):
+        """Подписка и отписка меняют счётчики обоих пользователей"""
+        url_kwargs = {'username': self.author.username}
+        self.authorized_client.get(reverse('profile_follow',
+                                           kwargs=url_kwargs))
+        self.assertEqual(
+            counters.stats_for(self.author).followers_count, 1)
+        self.assertEqual(
+            counters.stats_for(self.follower).following_count, 1)
+        self.authorized_client.get(reverse('profile_unfollow',
+                                           kwargs=url_kwargs))
+        self.assertEqual(
+            counters.stats_for(self.author).followers_count, 0)
+
+    def test_posts_count(self):
+        """Счётчик постов автора"""
+        Post.objects.create(text='Second', author=self.author)
+        self.assertEqual(counters.stats_for(self.author).posts_count, 2)
+        response = self.authorized_client.get(reverse('profile', kwargs={
+            'username': self.author.username
+        }))
+        self.assertEqual(response.context['post_count'], 2)
+
+    def test_missing_stats(self):
+        """Для пользователя без строки статистики она считается при чтении"""
+        UserStats.objects.filter(user=self.author).delete()
+        self.assertEqual(counters.stats_for(self.author).posts_count, 1)
+
+    def test_repair_command(self):
+        """Команда repair_counters исправляет расхождения"""
+        Post.objects.filter(pk=self.post.pk).update(comment_count=7)
+        UserStats.objects.filter(user=self.author).update(posts_count=0)
+        out = StringIO()
+        call_command('repair_counters', stdout=out)
+        self.assertIn('2', out.getvalue())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 0)
+        self.assertEqual(counters.stats_for(self.author).posts_count, 1)
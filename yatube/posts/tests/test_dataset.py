@@ -0,0 +1,103 @@
+import datetime as dt
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import counters, search
+from ..models import Comment, Follow, Group, Post, TimelineEntry, User
+
+TEMP_MEDIA = tempfile.mkdtemp(dir=settings.BASE_DIR)
+OPTIONS = {'users': 60, 'groups': 5, 'posts': 300, 'follows': 5,
+           'comments': 2, 'image_files': 2, 'until': timezone.make_aware(
+               dt.datetime(2021, 1, 1)), 'days': 30, 'batch_size': 50}
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA)
+class GenerateDatasetTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+
+    def generate(self, **options):
+        out = StringIO()
+        call_command('generate_dataset', stdout=out, **{**OPTIONS,
+                                                        **options})
+        return out.getvalue()
+
+    def snapshot(self):
+        return (
+            list(Post.objects.order_by('id').values_list(
+                'author_id', 'group_id', 'text', 'pub_date', 'image')),
+            list(Follow.objects.order_by('id').values_list('user_id',
+                                                           'author_id')),
+            list(Comment.objects.order_by('id').values_list(
+                'post_id', 'author_id', 'text', 'created')),
+        )
+
+    def test_dataset(self):
+        """Набор нужного размера, счётчики, ленты и поиск согласованы"""
+        out = self.generate()
+        self.assertIn('posts: 300', out)
+        self.assertEqual(User.objects.count(), 60)
+        self.assertEqual(Group.objects.count(), 5)
+        self.assertEqual(Post.objects.count(), 300)
+        self.assertEqual(counters.repair(), 0)
+        self.assertEqual(
+            TimelineEntry.objects.count(),
+            sum(Post.objects.filter(author=follow.author_id).count()
+                for follow in Follow.objects.all())
+        )
+        found = {post.id for post in search.search('город')}
+        self.assertEqual(found, {
+            post.id for post in Post.objects.all()
+            if 'город' in post.text.lower().split()
+        })
+        dates = Post.objects.values_list('pub_date', flat=True)
+        self.assertTrue(all(OPTIONS['until'] - dt.timedelta(days=30)
+                            <= date <= OPTIONS['until'] for date in dates))
+
+    def test_skewed_followers(self):
+        """Подписчики распределены неравномерно"""
+        self.generate()
+        followers = sorted(
+            counters.stats_for(user).followers_count
+            for user in User.objects.all()
+        )
+        top = sum(followers[-6:])
+        self.assertGreater(top, sum(followers) / 3)
+
+    def test_archive_refreshed(self):
+        """Сохранённые страницы архива за месяцы набора рисуются заново"""
+        url = reverse('archive', args=[2020, 12])
+        client = Client()
+        self.assertNotContains(client.get(url), 'dataset')
+        self.generate()
+        self.assertContains(client.get(url), 'dataset')
+
+    def clear(self):
+        for model in (Post, Follow, User, Group):
+            model.objects.all().delete()
+
+    def test_reproducible(self):
+        """Одинаковый seed - одинаковые строки, другой seed - другие"""
+        self.generate(seed=1)
+        first = self.snapshot()
+        self.clear()
+        self.generate(seed=1)
+        self.assertEqual(self.snapshot(), first)
+        self.clear()
+        self.generate(seed=2)
+        other = self.snapshot()
+        for rows, first_rows in zip(other, first):
+            self.assertNotEqual(rows, first_rows)
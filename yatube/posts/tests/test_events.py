@@ -0,0 +1,123 @@
+import asyncio
+
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import events
+from ..models import Group, Post, User
+from ..stream import stream
+
+
+class StreamClient:
+    """Подключение к потоку: отключается, получив expected событий."""
+
+    def __init__(self, expected, on_event=None):
+        self.expected = expected
+        self.on_event = on_event
+        self.started = False
+        self.status = None
+        self.body = b''
+        self.done = asyncio.Event()
+
+    async def receive(self):
+        if not self.started:
+            self.started = True
+            return {'type': 'http.request', 'body': b''}
+        await self.done.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(self, message):
+        if message['type'] == 'http.response.start':
+            self.status = message['status']
+            return
+        self.body += message.get('body', b'')
+        count = self.body.count(b'event: new_post')
+        if self.on_event and count:
+            self.on_event(count)
+        if count >= self.expected or not message.get('more_body'):
+            self.done.set()
+
+    def events(self):
+        return [int(line[4:]) for line in self.body.decode().splitlines()
+                if line.startswith('id: ')]
+
+
+@async_to_sync
+async def connect(client, query, last_id=None):
+    headers = [(b'last-event-id', str(last_id).encode())] if last_id else []
+    scope = {'type': 'http', 'path': '/events/', 'headers': headers,
+             'query_string': query.encode()}
+    await asyncio.wait_for(stream(scope, client.receive, client.send), 5)
+
+
+class EventsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_bus_channels(self):
+        """Событие получают только подписчики его каналов"""
+        async def run():
+            posts = events.bus.subscribe([events.POSTS])
+            other = events.bus.subscribe([events.group(self.group.id + 1)])
+            post = Post(id=1, author_id=self.user.id, group_id=self.group.id)
+            self.assertEqual(events.publish_post(post), 1)
+            event = await asyncio.wait_for(posts.queue.get(), 1)
+            self.assertTrue(other.queue.empty())
+            events.bus.unsubscribe(posts)
+            events.bus.unsubscribe(other)
+            return event
+        event = asyncio.run(run())
+        self.assertEqual(event, {'id': 1, 'author': self.user.id,
+                                 'group': self.group.id})
+
+    def test_replay_then_live(self):
+        """После переподключения приходят пропущенные, затем новые посты"""
+        first, *missed = [
+            Post.objects.create(text=str(i), author=self.user,
+                                group=self.group)
+            for i in range(3)
+        ]
+        Post.objects.create(text='Без группы', author=self.user)
+        live = Post.objects.create(text='Новый', author=self.user,
+                                   group=self.group)
+
+        def publish(count):
+            if count == len(missed):
+                events.publish_post(live)
+        client = StreamClient(3, publish)
+        connect(client, 'feed=group:group', last_id=first.id)
+        self.assertEqual(client.status, 200)
+        self.assertEqual(client.events(),
+                         [post.id for post in missed] + [live.id])
+
+    def test_unknown_feed(self):
+        """Неизвестная лента и лента подписок без входа - 404"""
+        for query in ('feed=group:missing', 'feed=follow', 'feed=other'):
+            with self.subTest(query=query):
+                client = StreamClient(0)
+                connect(client, query)
+                self.assertEqual(client.status, 404)
+
+    def test_cards_fragment(self):
+        """Фрагмент содержит только запрошенные карточки"""
+        posts = [Post.objects.create(text=f'Пост {i}', author=self.user)
+                 for i in range(3)]
+        response = Client().get(reverse('post_cards'),
+                                {'ids': f'{posts[0].id},{posts[2].id},x'})
+        self.assertEqual(list(response.context['posts']),
+                         [posts[2], posts[0]])
+        self.assertNotContains(response, 'Пост 1')
+        self.assertNotContains(response, '<html')
+
+    def test_live_feed_on_first_page(self):
+        """Живая лента подключается на первой странице"""
+        response = Client().get(reverse('index'))
+        self.assertContains(response, 'data-stream="/events/?feed=posts"')
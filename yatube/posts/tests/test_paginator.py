@@ -0,0 +1,93 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Follow, Post, User
+from ..paginator import KeysetPaginator, encode_cursor
+
+TAMPERED = (
+    ['not-a-date', 1], [{'a': 1}, 1], [None, None],
+    ['2020-01-01T00:00:00', 'abc'],
+)
+
+
+class KeysetPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        for i in range(25):
+            Post.objects.create(author=cls.user, text=f'Тестовый пост {i}')
+        Post.objects.filter(id__lte=12).update(pub_date=timezone.now())
+        cls.posts = list(Post.objects.order_by('-pub_date', '-id'))
+
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+
+    def walk(self, url):
+        pages = []
+        response = self.client.get(url)
+        pages.append(list(response.context['page']))
+        while response.context['page'].next_cursor:
+            response = self.client.get(
+                url + '?' + response.context['page'].next_query
+            )
+            pages.append(list(response.context['page']))
+        return pages, response
+
+    def test_walk_forward(self):
+        """По курсорам after обходятся все посты без повторов"""
+        for url in (reverse('index'), reverse('profile', kwargs={
+                'username': self.user.username})):
+            with self.subTest(url=url):
+                pages, _ = self.walk(url)
+                self.assertEqual([len(page) for page in pages], [10, 10, 5])
+                self.assertEqual(sum(pages, []), self.posts)
+
+    def test_walk_back(self):
+        """Курсор before возвращает на предыдущую страницу"""
+        pages, response = self.walk(reverse('index'))
+        page = response.context['page']
+        response = self.client.get(
+            reverse('index') + '?' + page.previous_query
+        )
+        self.assertEqual(list(response.context['page']), pages[1])
+
+    def test_no_count_query(self):
+        """Страница по курсору стоит один запрос без COUNT(*)"""
+        paginator = KeysetPaginator(Post.objects.all(), 10)
+        cursor = paginator.cursor(self.posts[19])
+        with self.assertNumQueries(1):
+            page = paginator.page_for({'after': cursor})
+        self.assertEqual(list(page), self.posts[20:])
+
+    def test_legacy_page_number(self):
+        """Старые ссылки ?page= продолжают работать"""
+        response = self.client.get(reverse('index') + '?page=2')
+        page = response.context['page']
+        self.assertEqual(list(page), self.posts[10:20])
+        response = self.client.get(reverse('index') + '?' + page.next_query)
+        self.assertEqual(list(response.context['page']), self.posts[20:])
+
+    def test_broken_cursor(self):
+        """Испорченный курсор открывает первую страницу"""
+        response = self.client.get(reverse('index') + '?after=broken')
+        self.assertEqual(list(response.context['page']), self.posts[:10])
+
+    def test_tampered_cursor(self):
+        """Курсор с чужими типами значений открывает первую страницу"""
+        follower = User.objects.create_user(username='TestFollower')
+        Follow.objects.create(user=follower, author=self.user)
+        self.client.force_login(follower)
+        for url in (reverse('index'), reverse('follow_index')):
+            first = list(self.client.get(url).context['page'])
+            for values in TAMPERED:
+                for param in ('after', 'before'):
+                    with self.subTest(url=url, values=values, param=param):
+                        response = self.client.get(
+                            url, {param: encode_cursor(values)}
+                        )
+                        self.assertEqual(list(response.context['page']),
+                                         first)
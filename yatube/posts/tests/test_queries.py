@@ -0,0 +1,52 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, ImageVariant, Post, User
+from .utils import QueryBudgetMixin
+
+
+class FeedQueriesTest(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.author = User.objects.create_user(username='TestAuthor')
+        cls.group = Group.objects.create(title='TestGroup', slug='test_slug',
+                                         description='Test description')
+        Follow.objects.create(user=cls.user, author=cls.author)
+        cls.urls = {
+            reverse('index'): 4,
+            reverse('group', kwargs={'slug': cls.group.slug}): 5,
+            reverse('profile', kwargs={'username': cls.author.username}): 7,
+            reverse('follow_index'): 5,
+        }
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        cache.clear()
+
+    def add_posts(self, count):
+        for i in range(count):
+            post = Post.objects.create(text=f'Тестовый пост {i}',
+                                       author=self.author, group=self.group,
+                                       image=f'posts/{i}.jpg')
+            ImageVariant.objects.create(
+                post=post, source=post.image.name, format='jpeg',
+                width=480, height=170, image=f'posts/variants/{i}.jpg'
+            )
+            Comment.objects.create(post=post, author=self.user, text='Test')
+
+    def test_query_budget(self):
+        """Число запросов ленты не зависит от числа постов на странице"""
+        for count in (1, 9):
+            self.add_posts(count)
+            for url, budget in self.urls.items():
+                with self.subTest(url=url, count=count):
+                    cache.clear()
+                    response = self.assertQueryBudget(
+                        self.authorized_client, url, budget
+                    )
+                    self.assertEqual(len(response.context['page']),
+                                     min(Post.objects.count(), 10))
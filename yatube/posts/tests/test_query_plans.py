@@ -0,0 +1,91 @@
+import re
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+
+# Полный проход по таблице без индекса или сортировка во временном B-дереве.
+BAD_PLAN = re.compile(r'^SCAN \S+$|^SCAN TABLE|USE TEMP B-TREE')
+
+
+def query_plan(sql):
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+class QueryPlanTest(TestCase):
+    """Запросы страниц лент и поста идут по индексам и без сортировки."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.author = User.objects.create_user(username='TestAuthor')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        Follow.objects.create(user=cls.user, author=cls.author)
+        for i in range(15):
+            cls.post = Post.objects.create(text=f'Пост {i}',
+                                           author=cls.author,
+                                           group=cls.group)
+            Comment.objects.create(post=cls.post, author=cls.user,
+                                   text='Комментарий')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def assertIndexedPlans(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        checked = 0
+        for query in queries.captured_queries:
+            if not query['sql'].startswith('SELECT') or (
+                    'posts_' not in query['sql']):
+                continue
+            checked += 1
+            plan = query_plan(query['sql'])
+            bad = [step for step in plan if BAD_PLAN.search(step)]
+            self.assertEqual(bad, [], f'{query["sql"]}\n{plan}')
+        self.assertTrue(checked)
+        return response
+
+    def assertFeedPlans(self, url):
+        response = self.assertIndexedPlans(url)
+        next_query = response.context['page'].next_query
+        self.assertTrue(next_query)
+        self.assertIndexedPlans(f'{url}?{next_query}')
+
+    def test_index(self):
+        """Главная и её следующая страница"""
+        self.assertFeedPlans(reverse('index'))
+
+    def test_group_posts(self):
+        """Лента группы"""
+        self.assertFeedPlans(reverse('group', args=[self.group.slug]))
+
+    def test_profile(self):
+        """Профиль автора"""
+        self.assertFeedPlans(reverse('profile',
+                                     args=[self.author.username]))
+
+    def test_follow_index(self):
+        """Лента подписок"""
+        self.assertFeedPlans(reverse('follow_index'))
+
+    def test_post_view(self):
+        """Пост с комментариями"""
+        self.assertIndexedPlans(reverse('post', args=[
+            self.author.username, self.post.id
+        ]))
+
+    def test_bad_plan_detected(self):
+        """Проверка действительно ловит полный проход и сортировку"""
+        plan = query_plan('SELECT * FROM posts_post ORDER BY text')
+        self.assertTrue([step for step in plan if BAD_PLAN.search(step)])
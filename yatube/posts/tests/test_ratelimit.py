@@ -0,0 +1,79 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from yatube import ratelimit
+
+from ..models import Post, User
+
+TEMP_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(
+    RATELIMIT_STORE=f'{TEMP_DIR}/ratelimit.mmap',
+    RATELIMIT_RATES={'post': {'user': '2/h', 'ip': '3/h'}},
+)
+class RateLimitTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.other = User.objects.create_user(username='TestOther')
+        cls.third = User.objects.create_user(username='TestThird')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        ratelimit.get_store().reset()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_new_post_limited(self):
+        """Сверх лимита пользователя новый пост не создаётся, ответ 429"""
+        for _ in range(2):
+            response = self.client.post(reverse('new_post'), {'text': 'Пост'})
+            self.assertEqual(response.status_code, 302)
+        response = self.client.post(reverse('new_post'), {'text': 'Пост'})
+        self.assertEqual(response.status_code, 429)
+        self.assertTemplateUsed(response, 'misc/429.html')
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(self.client.get(reverse('new_post')).status_code,
+                         200)
+
+    def test_ip_bucket(self):
+        """Ведро адреса общее для всех пользователей с него"""
+        self.client.post(reverse('new_post'), {'text': 'Пост'})
+        other = Client()
+        other.force_login(self.other)
+        for _ in range(2):
+            other.post(reverse('new_post'), {'text': 'Пост'})
+        third = Client()
+        third.force_login(self.third)
+        response = third.post(reverse('new_post'), {'text': 'Пост'})
+        self.assertEqual(response.status_code, 429)
+        response = third.post(reverse('new_post'), {'text': 'Пост'},
+                              REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Post.objects.count(), 4)
+
+    def test_api_shares_buckets(self):
+        """API тратит те же вёдра и не ограничивает чтение"""
+        self.client.post(reverse('new_post'), {'text': 'Пост'})
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post('/api/v1/posts/', {'text': 'API'})
+        self.assertEqual(response.status_code, 201)
+        response = client.post('/api/v1/posts/', {'text': 'API'})
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(client.get('/api/v1/posts/').status_code, 200)
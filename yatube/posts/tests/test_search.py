@@ -0,0 +1,109 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from .. import search
+from ..models import Group, Post, User
+
+
+class SearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='TestAuthor')
+        cls.other = User.objects.create_user(username='OtherAuthor')
+        cls.group = Group.objects.create(title='Группа', slug='group',
+                                         description='test')
+        cls.best = Post.objects.create(
+            author=cls.author, group=cls.group,
+            text='Котики котики и ещё раз котики'
+        )
+        cls.good = Post.objects.create(author=cls.other,
+                                       text='Про котиков и собак')
+        cls.miss = Post.objects.create(author=cls.author,
+                                       text='Совсем о другом')
+
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+
+    def found(self, params):
+        response = self.client.get(reverse('search'), params)
+        return list(response.context['page'])
+
+    def test_ranked(self):
+        """Результаты отсортированы по релевантности"""
+        self.assertEqual(self.found({'q': 'котик'}), [self.best, self.good])
+        self.assertEqual(self.found({'q': 'собак котик'}), [self.good])
+
+    def test_filters(self):
+        """Фильтры по группе и автору"""
+        self.assertEqual(self.found({'q': 'котик', 'group': 'group'}),
+                         [self.best])
+        self.assertEqual(self.found({'q': 'котик', 'author': 'OtherAuthor'}),
+                         [self.good])
+
+    def test_index_follows_changes(self):
+        """Индекс обновляется при правке и удалении поста"""
+        post = Post.objects.get(pk=self.miss.pk)
+        post.text = 'Теперь и тут котик'
+        post.save()
+        self.assertIn(post, self.found({'q': 'котик'}))
+        Post.objects.filter(pk=self.best.pk).delete()
+        self.assertNotIn(self.best, self.found({'q': 'котик'}))
+
+    def test_syntax_is_escaped(self):
+        """Спецсимволы FTS5 в запросе не приводят к ошибке"""
+        response = self.client.get(reverse('search'),
+                                   {'q': '"котик OR (NEAR'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.found({'q': '***'}), [])
+
+    def test_keyset_pages(self):
+        """Страницы поиска идут по курсору без повторов"""
+        posts = [
+            Post.objects.create(author=self.author, text=f'ёлка {i}')
+            for i in range(15)
+        ]
+        response = self.client.get(reverse('search'), {'q': 'ёлка'})
+        first = list(response.context['page'])
+        response = self.client.get(
+            reverse('search') + '?' + response.context['page'].next_query
+        )
+        second = list(response.context['page'])
+        self.assertEqual(len(first), 10)
+        self.assertCountEqual(first + second, posts)
+
+    def test_api_search(self):
+        """Действие search в API"""
+        client = APIClient()
+        response = client.get('/api/v1/posts/search/', {'q': 'котик'})
+        data = response.json()
+        self.assertEqual([post['id'] for post in data['results']],
+                         [self.best.id, self.good.id])
+        self.assertIsNone(data['next'])
+
+    def test_admin_search(self):
+        """Поиск в админке идёт через индекс"""
+        admin = get_user_model().objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        self.client.force_login(admin)
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'собак'}
+        )
+        self.assertEqual(list(response.context['cl'].result_list),
+                         [self.good])
+
+    def test_rebuild_command(self):
+        """Команда заново строит индекс"""
+        search.remove_post(self.best.pk)
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn('3', out.getvalue())
+        self.assertIn(self.best, self.found({'q': 'котик'}))
@@ -0,0 +1,103 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from .. import thumbnails, variants
+from ..models import ImageVariant, Post, ThumbnailJob, User
+
+TEMP_MEDIA = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def make_image(name='image.jpg', size=(40, 20)):
+    data = BytesIO()
+    Image.new('RGB', size, 'red').save(data, 'JPEG')
+    return SimpleUploadedFile(name, data.getvalue(),
+                              content_type='image/jpeg')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA)
+class ThumbnailQueueTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_thumbnail_generated_off_request(self):
+        """Миниатюра создаётся обработчиком очереди, а не при показе"""
+        post = Post.objects.create(text='text', author=self.user,
+                                   image=make_image())
+        self.assertEqual(ThumbnailJob.objects.filter(post=post).count(), 1)
+        response = self.client.get(reverse('index'))
+        self.assertContains(response, f'src="{post.image.url}"')
+
+        job = thumbnails.claim()
+        self.assertTrue(thumbnails.process(job))
+        self.assertFalse(ThumbnailJob.objects.exists())
+        self.assertIsNotNone(thumbnails.ready_url(post.image))
+        jpeg = post.image_variants.get(format='jpeg')
+        response = self.client.get(reverse('index'))
+        self.assertContains(response, '<picture>')
+        self.assertContains(response, f'src="{jpeg.image.url}"')
+
+    def test_claim_once(self):
+        """Задачу забирает только один обработчик"""
+        Post.objects.create(text='text', author=self.user,
+                            image=make_image())
+        self.assertIsNotNone(thumbnails.claim())
+        self.assertIsNone(thumbnails.claim())
+
+    def test_backfill(self):
+        """Команда ставит в очередь картинки без миниатюр"""
+        post = Post.objects.create(text='text', author=self.user,
+                                   image=make_image())
+        ThumbnailJob.objects.all().delete()
+        out = StringIO()
+        call_command('backfill_thumbnails', stdout=out)
+        self.assertTrue(ThumbnailJob.objects.filter(post=post).exists())
+        self.assertIn('1', out.getvalue())
+
+    def test_variants(self):
+        """Для картинки создаются ширины и форматы, карточка отдаёт srcset"""
+        post = Post.objects.create(text='text', author=self.user,
+                                   image=make_image(size=(1000, 400)))
+        created = variants.build(post)
+        formats = [name for name, *_ in variants.supported_formats()]
+        self.assertIn('webp', formats)
+        self.assertEqual(len(created), 2 * len(formats))
+        self.assertEqual(
+            sorted({variant.width for variant in created}), [480, 960]
+        )
+        webp = post.image_variants.get(format='webp', width=960)
+        with Image.open(webp.image.path) as image:
+            self.assertEqual((image.format, image.size),
+                             ('WEBP', (960, 339)))
+
+        response = self.client.get(reverse('index'))
+        self.assertContains(response, 'type="image/webp"')
+        self.assertContains(response, f'{webp.image.url} 960w')
+
+    def test_variants_replaced(self):
+        """Повторная сборка заменяет строки, а не добавляет новые"""
+        post = Post.objects.create(text='text', author=self.user,
+                                   image=make_image())
+        variants.build(post)
+        count = ImageVariant.objects.count()
+        variants.build(post)
+        self.assertEqual(ImageVariant.objects.count(), count)
@@ -0,0 +1,77 @@
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import timeline
+from ..models import Follow, Post, TimelineEntry, User
+
+
+class TimelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='TestAuthor')
+        cls.follower = User.objects.create_user(username='TestFollower')
+        cls.post = Post.objects.create(text='Old post', author=cls.author)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.follower)
+
+    def follow(self):
+        self.authorized_client.get(reverse('profile_follow', kwargs={
+            'username': self.author.username
+        }))
+
+    def test_backfill_on_follow(self):
+        """При подписке старые посты автора попадают в ленту"""
+        self.follow()
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.follower, post=self.post).exists())
+
+    def test_fan_out_on_new_post(self):
+        """Новый пост раскладывается по лентам подписчиков"""
+        self.follow()
+        post = Post.objects.create(text='New post', author=self.author)
+        entry = TimelineEntry.objects.get(user=self.follower, post=post)
+        self.assertEqual(entry.pub_date, post.pub_date)
+        response = self.authorized_client.get(reverse('follow_index'))
+        self.assertEqual(list(response.context['page']), [post, self.post])
+
+    def test_prune_on_unfollow(self):
+        """При отписке посты автора убираются из ленты"""
+        self.follow()
+        self.authorized_client.get(reverse('profile_unfollow', kwargs={
+            'username': self.author.username
+        }))
+        self.assertFalse(TimelineEntry.objects.exists())
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_pulled_author(self):
+        """Посты популярного автора подмешиваются в ленту при чтении"""
+        Follow.objects.create(user=self.follower, author=self.author)
+        post = Post.objects.create(text='New post', author=self.author)
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(list(timeline.feed_for(self.follower)),
+                         [post, self.post])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_threshold_crossing(self):
+        """Автор уходит за порог и возвращается без потерь в лентах"""
+        other = User.objects.create_user(username='TestOther')
+        self.follow()
+        Follow.objects.create(user=other, author=self.author)
+        self.assertFalse(TimelineEntry.objects.exists())
+        pulled = Post.objects.create(text='Pulled post', author=self.author)
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(list(timeline.feed_for(other)),
+                         [pulled, self.post])
+
+        Follow.objects.get(user=other).delete()
+        self.assertEqual(list(timeline.feed_for(self.follower)),
+                         [pulled, self.post])
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.follower).count(), 2
+        )
+        pushed = Post.objects.create(text='Pushed post', author=self.author)
+        self.assertEqual(list(timeline.feed_for(self.follower)),
+                         [pushed, pulled, self.post])
@@ -0,0 +1,111 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from rest_framework.test import APIClient
+
+from ..models import Post, User
+
+TEMP_MEDIA = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def make_jpeg(size=(40, 20), exif=True):
+    image = Image.new('RGB', size, 'red')
+    data = BytesIO()
+    options = {}
+    if exif:
+        metadata = Image.Exif()
+        metadata[0x010F] = 'Camera maker'
+        options['exif'] = metadata.tobytes()
+    image.save(data, 'JPEG', **options)
+    return SimpleUploadedFile('image.jpg', data.getvalue(),
+                              content_type='image/jpeg')
+
+
+def make_gif(frames, size=(10, 10)):
+    images = [Image.new('RGB', size, (color * 40, 0, 0))
+              for color in range(frames)]
+    data = BytesIO()
+    images[0].save(data, 'GIF', save_all=True, append_images=images[1:])
+    return SimpleUploadedFile('image.gif', data.getvalue(),
+                              content_type='image/gif')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA)
+class ImageUploadTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestAuthor')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_exif_stripped(self):
+        """Картинка сохраняется перекодированной и без EXIF"""
+        self.authorized_client.post(reverse('new_post'), {
+            'text': 'text', 'image': make_jpeg()
+        })
+        post = Post.objects.get()
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.size, (40, 20))
+            self.assertNotIn('exif', image.info)
+            self.assertFalse(image.getexif())
+
+    @override_settings(IMAGE_UPLOAD_MAX_PIXELS=100)
+    def test_too_many_pixels(self):
+        """Слишком большая по пикселям картинка отклоняется"""
+        response = self.authorized_client.post(reverse('new_post'), {
+            'text': 'text', 'image': make_jpeg()
+        })
+        self.assertFalse(Post.objects.exists())
+        self.assertFormError(response, 'form', 'image',
+                             'Картинка 40x20 слишком большая.')
+
+    @override_settings(IMAGE_UPLOAD_MAX_PIXELS=250)
+    def test_animation_frames_counted(self):
+        """Пиксели анимации считаются по всем кадрам"""
+        response = self.authorized_client.post(reverse('new_post'), {
+            'text': 'text', 'image': make_gif(3)
+        })
+        self.assertFalse(Post.objects.exists())
+        self.assertFormError(response, 'form', 'image',
+                             'Анимация 10x10 из 3 кадров слишком большая.')
+        self.authorized_client.post(reverse('new_post'), {
+            'text': 'text', 'image': make_gif(2)
+        })
+        with Image.open(Post.objects.get().image.path) as image:
+            self.assertEqual(image.n_frames, 2)
+
+    @override_settings(IMAGE_UPLOAD_FORMATS=('PNG',))
+    def test_format_not_allowed(self):
+        """Формат вне списка разрешённых отклоняется"""
+        response = self.authorized_client.post(reverse('new_post'), {
+            'text': 'text', 'image': make_jpeg()
+        })
+        self.assertFalse(Post.objects.exists())
+        self.assertFormError(response, 'form', 'image',
+                             'Формат JPEG не поддерживается.')
+
+    @override_settings(IMAGE_UPLOAD_MAX_PIXELS=100)
+    def test_api_limits(self):
+        """Ограничения действуют и для загрузки через API"""
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post('/api/v1/posts/', {
+            'text': 'text', 'image': make_jpeg()
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('image', response.json())
+        self.assertFalse(Post.objects.exists())
@@ -3,7 +3,7 @@ from django.urls import reverse
 from django import forms
 from django.core.cache import cache
 
-from ..models import Group, Post, User
+from ..models import Comment, Group, Post, User
 
 
 class PagesTests(TestCase):
@@ -177,17 +177,63 @@ class TestCacheIndex(TestCase):
         cls.post = Post.objects.create(author=cls.user, group=cls.group,
                                        text='text')
 
-    def test_cache_index(self):
-        """Проверка что страница индекса работает с 20 секундным кешем..........
-        """
-        response = self.authorized_user.get(reverse('index'))
+    def setUp(self):
+        cache.clear()
+
+    def test_new_post_visible(self):
+        """Новый пост сразу появляется на главной"""
+        self.authorized_user.get(reverse('index'))
         Post.objects.create(author=self.user, text='test cache text',
                             group=self.group)
-        response1 = self.authorized_user.get(reverse('index'))
-        self.assertEqual(response.content, response1.content)
-        cache.clear()
-        response3 = self.authorized_user.get(reverse('index'))
-        self.assertNotEqual(response3.content, response1.content)
-        self.assertEqual(response3.context['page'][0].text,
-                         'test cache text')
-        self.assertEqual(len(response3.context['page'].object_list), 2)
+        response = self.authorized_user.get(reverse('index'))
+        self.assertContains(response, 'test cache text')
+        self.assertEqual(len(response.context['page'].object_list), 2)
+
+    def test_card_cache(self):
+        """Карточка поста берётся из кеша до изменения поста"""
+        self.authorized_user.get(reverse('index'))
+        Post.objects.filter(pk=self.post.pk).update(text='stale text')
+        response = self.authorized_user.get(reverse('index'))
+        self.assertNotContains(response, 'stale text')
+        self.post.text = 'fresh text'
+        self.post.save()
+        response = self.authorized_user.get(reverse('index'))
+        self.assertContains(response, 'fresh text')
+
+    def test_rename_invalidates_card(self):
+        """Переименование автора обновляет его карточки и ETag ленты"""
+        response = self.authorized_user.get(reverse('index'))
+        etag = response['ETag']
+        user = User.objects.get(pk=self.user.pk)
+        user.username = 'RenamedUser'
+        user.save()
+        response = self.authorized_user.get(reverse('index'),
+                                            HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '@RenamedUser')
+        self.assertContains(response, reverse('profile',
+                                              args=['RenamedUser']))
+
+    def test_login_keeps_card(self):
+        """Вход пользователя не сбрасывает его карточки"""
+        self.authorized_user.get(reverse('index'))
+        Post.objects.filter(pk=self.post.pk).update(text='stale text')
+        User.objects.get(pk=self.user.pk).save(update_fields=['last_login'])
+        response = self.authorized_user.get(reverse('index'))
+        self.assertNotContains(response, 'stale text')
+
+    def test_comment_invalidates_card(self):
+        """Новый комментарий обновляет счётчик на карточке"""
+        self.authorized_user.get(reverse('index'))
+        Comment.objects.create(post=self.post, author=self.user, text='c')
+        response = self.authorized_user.get(reverse('index'))
+        self.assertContains(response, 'Комментариев: 1')
+
+    def test_viewer_specific_buttons(self):
+        """Кнопка редактирования видна только автору"""
+        self.authorized_user.get(reverse('index'))
+        edit_url = reverse('post_edit', kwargs={
+            'username': self.user.username, 'post_id': self.post.id})
+        self.assertContains(self.authorized_user.get(reverse('index')),
+                            edit_url)
+        self.assertNotContains(Client().get(reverse('index')), edit_url)
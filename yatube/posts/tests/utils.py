@@ -0,0 +1,15 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    def assertQueryBudget(self, client, url, budget):
+        """Страница укладывается в заданное число SQL-запросов."""
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        queries = '\n'.join(query['sql'] for query in context.captured_queries)
+        self.assertLessEqual(
+            len(context), budget,
+            f'{url}: {len(context)} запросов вместо {budget}:\n{queries}'
+        )
+        return response
@@ -0,0 +1,112 @@
+import logging
+import time
+from datetime import timedelta
+
+from django.db import close_old_connections, connection
+from django.db.models import F
+from django.utils import timezone
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile
+
+from . import cards, variants
+from .models import ThumbnailJob
+
+logger = logging.getLogger(__name__)
+
+GEOMETRY = '960x339'
+OPTIONS = {'crop': 'center', 'upscale': True}
+MAX_ATTEMPTS = 3
+STALE_AFTER = timedelta(minutes=10)
+
+
+def _thumbnail_file(image):
+    # Имя миниатюры считается так же, как в ThumbnailBackend.get_thumbnail.
+    backend = default.backend
+    options = dict(OPTIONS)
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(sorl_settings, attr)
+        if value != getattr(sorl_defaults, attr):
+            options.setdefault(key, value)
+    name = backend._get_thumbnail_filename(ImageFile(image), GEOMETRY,
+                                           options)
+    return ImageFile(name, default.storage)
+
+
+def ready_url(image):
+    """URL готовой миниатюры или None; файлы и картинки не трогает."""
+    thumbnail = default.kvstore.get(_thumbnail_file(image))
+    return thumbnail.url if thumbnail else None
+
+
+def card_url(image):
+    return ready_url(image) or image.url
+
+
+def enqueue(post):
+    ThumbnailJob.objects.get_or_create(post=post,
+                                       status=ThumbnailJob.PENDING)
+
+
+def enqueue_many(posts):
+    """enqueue() для новых постов: у них ещё нет задач в очереди."""
+    ThumbnailJob.objects.bulk_create([
+        ThumbnailJob(post=post, status=ThumbnailJob.PENDING)
+        for post in posts
+        if post.image and ready_url(post.image) is None
+    ])
+
+
+def claim():
+    ThumbnailJob.objects.filter(
+        status=ThumbnailJob.RUNNING, started__lt=timezone.now() - STALE_AFTER
+    ).update(status=ThumbnailJob.PENDING)
+    pending = ThumbnailJob.objects.filter(status=ThumbnailJob.PENDING)
+    for job_id in pending.values_list('id', flat=True)[:10]:
+        claimed = ThumbnailJob.objects.filter(
+            pk=job_id, status=ThumbnailJob.PENDING
+        ).update(status=ThumbnailJob.RUNNING, started=timezone.now(),
+                 attempts=F('attempts') + 1)
+        if claimed:
+            return ThumbnailJob.objects.select_related('post').filter(
+                pk=job_id
+            ).first()
+    return None
+
+
+def process(job):
+    try:
+        if job.post.image:
+            get_thumbnail(job.post.image, GEOMETRY, **OPTIONS)
+            variants.build(job.post)
+    except Exception as error:
+        logger.exception('Миниатюра для поста %s не создана', job.post_id)
+        failed = job.attempts >= MAX_ATTEMPTS
+        ThumbnailJob.objects.filter(pk=job.pk).update(
+            status=ThumbnailJob.FAILED if failed else ThumbnailJob.PENDING,
+            error=str(error),
+        )
+        return False
+    job.delete()
+    cards.bump(job.post_id)
+    return True
+
+
+def work(once=False, poll=1.0):
+    """Цикл одного обработчика очереди, возвращает число готовых задач."""
+    done = 0
+    try:
+        while True:
+            close_old_connections()
+            job = claim()
+            if job is None:
+                if once:
+                    return done
+                time.sleep(poll)
+                continue
+            done += process(job)
+    finally:
+        connection.close()
@@ -0,0 +1,148 @@
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, Q
+
+from .counters import stats_for
+from .models import Follow, Post, TimelineEntry, User
+
+BATCH_SIZE = 500
+
+
+def is_pushed(author_id):
+    """Посты автора раскладываются по лентам подписчиков при записи.
+
+    У авторов с огромным числом подписчиков такая раскладка слишком
+    дорогая, их посты подмешиваются в ленту при чтении.
+    """
+    followers = stats_for(User(pk=author_id)).followers_count
+    return followers <= settings.TIMELINE_FANOUT_LIMIT
+
+
+def fan_out(post):
+    if not is_pushed(post.author_id):
+        return
+    followers = Follow.objects.filter(
+        author=post.author_id
+    ).values_list('user', flat=True)
+    entries = (
+        TimelineEntry(user_id=user_id, post=post, author_id=post.author_id,
+                      pub_date=post.pub_date)
+        for user_id in followers.iterator()
+    )
+    _bulk_create(entries)
+
+
+def backfill(user_id, author_id):
+    if not is_pushed(author_id):
+        return
+    posts = Post.objects.filter(
+        author=author_id
+    ).values_list('id', 'pub_date')
+    entries = (
+        TimelineEntry(user_id=user_id, post_id=post_id, author_id=author_id,
+                      pub_date=pub_date)
+        for post_id, pub_date in posts.iterator()
+    )
+    _bulk_create(entries)
+
+
+def fan_out_many(posts):
+    """fan_out() для пачки новых постов одним запросом."""
+    _insert_from_follows(
+        'post.id IN ({}) AND coalesce(stats.followers_count, 0) <= %s'
+        .format(', '.join(['%s'] * len(posts))),
+        [post.pk for post in posts] + [settings.TIMELINE_FANOUT_LIMIT]
+    )
+
+
+def backfill_many(follows):
+    """backfill() для пачки новых подписок одним запросом."""
+    _insert_from_follows(
+        'follow.id IN ({}) AND coalesce(stats.followers_count, 0) <= %s'
+        .format(', '.join(['%s'] * len(follows))),
+        [follow.pk for follow in follows] + [settings.TIMELINE_FANOUT_LIMIT]
+    )
+
+
+def prune(user_id, author_id):
+    TimelineEntry.objects.filter(user=user_id, author=author_id).delete()
+
+
+def rebalance(author_id, added):
+    """Переводит автора между раскладкой и подмешиванием.
+
+    added - на сколько только что изменилось число подписчиков. Пока
+    автор подмешивался, его посты не раскладывались и новые подписчики
+    не получали старых постов, поэтому при возврате под порог лента
+    всех подписчиков заполняется заново. Над порогом записи автора не
+    нужны: feed_for читает его посты напрямую.
+    """
+    followers = stats_for(User(pk=author_id)).followers_count
+    limit = settings.TIMELINE_FANOUT_LIMIT
+    if followers - added <= limit < followers:
+        TimelineEntry.objects.filter(author=author_id).delete()
+    elif followers <= limit < followers - added:
+        _insert_from_follows('post.author_id = %s', [author_id])
+
+
+def rebuild():
+    """Заново раскладывает посты по лентам подписчиков одним запросом.
+
+    Нужна после массовой загрузки в обход сигналов; авторы с числом
+    подписчиков выше TIMELINE_FANOUT_LIMIT пропускаются, как в fan_out.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute('DELETE FROM posts_timelineentry')
+    return _insert_from_follows(
+        'coalesce(stats.followers_count, 0) <= %s',
+        [settings.TIMELINE_FANOUT_LIMIT]
+    )
+
+
+def _insert_from_follows(where, params):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'INSERT OR IGNORE INTO posts_timelineentry '
+            '(user_id, post_id, author_id, pub_date) '
+            'SELECT follow.user_id, post.id, post.author_id, post.pub_date '
+            'FROM posts_post AS post '
+            'INNER JOIN posts_follow AS follow '
+            'ON follow.author_id = post.author_id '
+            'LEFT JOIN posts_userstats AS stats '
+            'ON stats.user_id = post.author_id '
+            f'WHERE {where}', params
+        )
+        return cursor.rowcount
+
+
+def pulled_authors(user):
+    return Follow.objects.filter(
+        user=user,
+        author__stats__followers_count__gt=settings.TIMELINE_FANOUT_LIMIT,
+    ).values_list('author', flat=True)
+
+
+def feed_for(user):
+    pulled = list(pulled_authors(user))
+    if not pulled:
+        posts = Post.objects.filter(timeline_entries__user=user).annotate(
+            feed_date=F('timeline_entries__pub_date'),
+            feed_id=F('timeline_entries__id'),
+        )
+    else:
+        pushed = TimelineEntry.objects.filter(user=user).values('post')
+        posts = Post.objects.filter(
+            Q(id__in=pushed) | Q(author__in=pulled)
+        ).annotate(feed_date=F('pub_date'), feed_id=F('id'))
+    return posts.order_by('-feed_date', '-feed_id')
+
+
+def _bulk_create(entries):
+    batch = []
+    for entry in entries:
+        batch.append(entry)
+        if len(batch) == BATCH_SIZE:
+            TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
@@ -0,0 +1,105 @@
+import os
+import tempfile
+import threading
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import UploadedFile
+from PIL import Image, ImageOps
+
+# Одновременно перекодируется не больше IMAGE_UPLOAD_WORKERS картинок.
+# На слот приходится до трёх копий картинки по 4 байта на пиксель:
+# исходная, повёрнутая exif_transpose и приведённая convert, то есть до
+# IMAGE_UPLOAD_MAX_PIXELS * 12 байт, а не размер загрузки. У анимации
+# в IMAGE_UPLOAD_MAX_PIXELS входят все кадры: save_all держит их разом.
+_slots = threading.BoundedSemaphore(settings.IMAGE_UPLOAD_WORKERS)
+
+SAVE_OPTIONS = {
+    'JPEG': {'quality': 90, 'optimize': True},
+    'PNG': {'optimize': True},
+    'WEBP': {'quality': 90},
+    'GIF': {},
+}
+
+
+def _source(upload):
+    # Загрузки лежат во временных файлах (FILE_UPLOAD_HANDLERS), в память
+    # они не читаются.
+    if hasattr(upload, 'temporary_file_path'):
+        return upload.temporary_file_path()
+    upload.seek(0)
+    return upload
+
+
+def check(upload):
+    """Проверяет размер, формат и число пикселей (всех кадров) по
+    заголовкам файла."""
+    if upload.size > settings.IMAGE_UPLOAD_MAX_BYTES:
+        raise ValidationError(
+            'Файл больше %(limit)s МБ.',
+            code='file_too_large',
+            params={'limit': settings.IMAGE_UPLOAD_MAX_BYTES // 2 ** 20},
+        )
+    try:
+        # Image.open читает только заголовок, пиксели не декодируются.
+        with Image.open(_source(upload)) as image:
+            image_format, (width, height) = image.format, image.size
+            # Кадры перебираются по заголовкам, без декодирования.
+            frames = getattr(image, 'n_frames', 1)
+    except (OSError, Image.DecompressionBombError):
+        raise ValidationError('Файл не является картинкой.',
+                              code='invalid_image')
+    if image_format not in settings.IMAGE_UPLOAD_FORMATS:
+        raise ValidationError(
+            'Формат %(format)s не поддерживается.',
+            code='invalid_format', params={'format': image_format},
+        )
+    if frames > 1 and width * height * frames > (
+            settings.IMAGE_UPLOAD_MAX_PIXELS):
+        raise ValidationError(
+            'Анимация %(width)sx%(height)s из %(frames)s кадров '
+            'слишком большая.',
+            code='too_many_pixels',
+            params={'width': width, 'height': height, 'frames': frames},
+        )
+    if width * height > settings.IMAGE_UPLOAD_MAX_PIXELS:
+        raise ValidationError(
+            'Картинка %(width)sx%(height)s слишком большая.',
+            code='too_many_pixels',
+            params={'width': width, 'height': height},
+        )
+    return image_format
+
+
+def _encode(source, image_format, target):
+    with Image.open(source) as image:
+        options = dict(SAVE_OPTIONS.get(image_format, {}))
+        icc_profile = image.info.get('icc_profile')
+        if icc_profile:
+            options['icc_profile'] = icc_profile
+        if getattr(image, 'n_frames', 1) > 1:
+            # Анимацию сохраняем целиком, метаданные кадров не переносятся.
+            image.save(target, image_format, save_all=True, **options)
+            return
+        image = ImageOps.exif_transpose(image)
+        if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        # EXIF и прочие метаданные не передаются в save и поэтому теряются.
+        image.save(target, image_format, **options)
+
+
+def process(upload):
+    """Проверяет загрузку и перекодирует её без EXIF во временный файл."""
+    if not isinstance(upload, UploadedFile):
+        return upload
+    image_format = check(upload)
+    # Хранилище копирует результат кусками; временный файл удаляется
+    # при закрытии.
+    target = tempfile.TemporaryFile(suffix='.upload')
+    with _slots:
+        _encode(_source(upload), image_format, target)
+    size = target.tell()
+    target.seek(0)
+    return UploadedFile(target, os.path.basename(upload.name),
+                        Image.MIME.get(image_format, upload.content_type),
+                        size)
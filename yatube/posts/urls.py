@@ -9,6 +9,15 @@ urlpatterns = [
     path('group/<slug:slug>/', views.group_posts, name='group'),
     path('new/', views.new_post, name='new_post'),
     path('follow/', views.follow_index, name='follow_index'),
+    path('search/', views.search_posts, name='search'),
+    path('cards/', views.post_cards, name='post_cards'),
+    path('archive/', views.archive_latest, name='archive_latest'),
+    path('archive/<int:year>/<int:month>/', views.archive_index,
+         name='archive'),
+    path('group/<slug:slug>/archive/<int:year>/<int:month>/',
+         views.archive_group, name='group_archive'),
+    path('<str:username>/archive/<int:year>/<int:month>/',
+         views.archive_profile, name='profile_archive'),
     path('<str:username>/', views.profile, name='profile'),
     path('<str:username>/<int:post_id>/', views.post_view, name='post'),
     path(
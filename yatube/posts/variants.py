@@ -0,0 +1,81 @@
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image, ImageOps
+
+from .models import ImageVariant
+
+WIDTHS = (480, 960, 1440)
+RATIO = 339 / 960
+# Порядок важен: браузер берёт первый <source>, который поддерживает.
+FORMATS = (
+    ('avif', 'AVIF', 'image/avif', {'quality': 50}),
+    ('webp', 'WEBP', 'image/webp', {'quality': 80, 'method': 4}),
+    ('jpeg', 'JPEG', 'image/jpeg', {'quality': 85, 'optimize': True,
+                                    'progressive': True}),
+)
+FALLBACK = 'jpeg'
+CONTENT_TYPES = {name: content_type for name, _, content_type, _ in FORMATS}
+
+
+def supported_formats():
+    Image.init()
+    return [spec for spec in FORMATS if spec[1] in Image.SAVE]
+
+
+def build(post):
+    """Пересоздаёт все ширины и форматы картинки поста."""
+    stem = os.path.splitext(os.path.basename(post.image.name))[0]
+    variants = []
+    with post.image.open('rb'), Image.open(post.image) as source:
+        source = ImageOps.exif_transpose(source).convert('RGB')
+        # Самую узкую ширину делаем всегда, остальные - без растягивания.
+        widths = [width for width in WIDTHS if width <= source.width]
+        for width in widths or WIDTHS[:1]:
+            height = round(width * RATIO)
+            resized = ImageOps.fit(source, (width, height), Image.LANCZOS)
+            for name, pil_format, _, options in supported_formats():
+                data = BytesIO()
+                resized.save(data, pil_format, **options)
+                variant = ImageVariant(post=post, source=post.image.name,
+                                       format=name, width=width,
+                                       height=height)
+                variant.image.save(f'{post.pk}/{stem}-{width}.{name}',
+                                   ContentFile(data.getvalue()), save=False)
+                variants.append(variant)
+    # Старые файлы удаляет сигнал post_delete после коммита.
+    with transaction.atomic():
+        ImageVariant.objects.filter(post=post).delete()
+        ImageVariant.objects.bulk_create(variants)
+    return variants
+
+
+def picture(post):
+    """Данные для <picture> из таблицы вариантов, без обращения к файлам."""
+    variants = sorted((
+        variant for variant in post.image_variants.all()
+        if variant.source == post.image.name
+    ), key=lambda variant: (variant.format, variant.width))
+    if not variants:
+        return None
+    srcsets = {}
+    for variant in variants:
+        srcsets.setdefault(variant.format, []).append(
+            f'{variant.image.url} {variant.width}w'
+        )
+    fallback = [
+        variant for variant in variants if variant.format == FALLBACK
+    ] or variants
+    return {
+        'sources': [
+            {'type': CONTENT_TYPES[name], 'srcset': ', '.join(srcsets[name])}
+            for name, *_ in FORMATS
+            if name in srcsets and name != FALLBACK
+        ],
+        'src': fallback[-1].image.url,
+        'srcset': ', '.join(srcsets.get(FALLBACK, [])),
+        'width': fallback[-1].width,
+        'height': fallback[-1].height,
+    }
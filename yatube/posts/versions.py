@@ -0,0 +1,50 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+KEY = 'collection_version:{}'
+POSTS = 'posts'
+FOLLOWS = 'follows'
+GROUPS = 'groups'
+
+
+def comments(post_id):
+    return f'comments:{post_id}'
+
+
+def get(name):
+    """Время последнего изменения коллекции, без запросов к базе."""
+    key = KEY.format(name)
+    current = cache.get(key)
+    if current is None:
+        # Версия потерялась: считаем, что коллекция изменилась сейчас.
+        cache.add(key, time.time(), None)
+        current = cache.get(key)
+    return current
+
+
+def bump(*names):
+    def save():
+        now = time.time()
+        cache.set_many({KEY.format(name): now for name in names}, None)
+    save()
+    # Повтор после коммита: читатель мог успеть получить новую версию
+    # со старыми данными, пока транзакция не завершилась.
+    transaction.on_commit(save)
+
+
+def etag(names, *parts):
+    values = [repr(get(name)) for name in names]
+    return '-'.join(values + [str(part) for part in parts])
+
+
+def feed_etag(*names):
+    """etag_func для condition(): версии коллекций и текущий пользователь.
+
+    Last-Modified для HTML не отдаём: страница зависит от пользователя,
+    а дата изменения - нет.
+    """
+    def func(request, *args, **kwargs):
+        return etag(names, request.user.pk or 0)
+    return func
@@ -1,18 +1,23 @@
-from django.core.paginator import Paginator
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
-from django.conf import settings
 from django.views.decorators.cache import cache_page
+from django.views.decorators.http import condition
 
+from yatube.ratelimit import ratelimit
+
+from . import archive, counters, search, timeline, versions
 from .models import Post, Group, User, Follow
+from .feeds import for_feed
 from .forms import PostForm, CommentForm
+from .paginator import paginate
+
+CARDS_MAX_IDS = 50
 
 
+@condition(etag_func=versions.feed_etag(versions.POSTS))
 def index(request):
-    post_list = Post.objects.select_related('group').all()
-    paginator = Paginator(post_list, settings.OBJECTS_COUNT)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    post_list = for_feed(Post.objects.all())
+    page = paginate(request, post_list)
     return render(
         request,
         'misc/index.html',
@@ -20,12 +25,11 @@ def index(request):
     )
 
 
+@condition(etag_func=versions.feed_etag(versions.POSTS, versions.GROUPS))
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = Post.objects.filter(group=group)
-    paginator = Paginator(posts, settings.OBJECTS_COUNT)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    posts = for_feed(Post.objects.filter(group=group))
+    page = paginate(request, posts)
     context = {
         'page': page,
         'group': group,
@@ -34,19 +38,20 @@ def group_posts(request, slug):
     return render(request, 'posts/group.html', context)
 
 
+@condition(etag_func=versions.feed_etag(versions.POSTS, versions.FOLLOWS))
 def profile(request, username):
     author = get_object_or_404(User, username=username)
-    post_list = Post.objects.filter(author=author)
-    paginator = Paginator(post_list, settings.OBJECTS_COUNT)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    post_list = for_feed(Post.objects.filter(author=author))
+    page = paginate(request, post_list)
     following = request.user.is_authenticated and (Follow.objects.filter(
         user=request.user, author=author).exists())
+    stats = counters.stats_for(author)
     context = {
         'author': author,
+        'stats': stats,
         'page': page,
-        'post_count': post_list.count(),
-        'paginator': paginator,
+        'post_count': stats.posts_count,
+        'paginator': page.paginator,
         'following': following
     }
     return render(request, 'posts/profile.html', context)
@@ -65,6 +70,7 @@ def post_view(request, username, post_id):
         'posts/post.html',
         {'post': post,
          'author': post.author,
+         'stats': counters.stats_for(post.author),
          'comments': comments,
          'form': form,
          }
@@ -86,7 +92,74 @@ def post_edit(request, username, post_id):
                   {'form': form, 'rename': 'edit', 'post': post})
 
 
+def search_posts(request):
+    query = request.GET.get('q', '').strip()
+    group = request.GET.get('group', '')
+    author = request.GET.get('author', '')
+    posts = for_feed(Post.objects.all())
+    if group:
+        posts = posts.filter(group__slug=group)
+    if author:
+        posts = posts.filter(author__username=author)
+    page = paginate(request, search.search(query, posts))
+    return render(request, 'posts/search.html', {
+        'page': page,
+        'query': query,
+        'group': group,
+        'author': author,
+        'groups': Group.objects.all(),
+    })
+
+
+def archive_latest(request):
+    year, month = archive.last_closed()
+    return redirect('archive', year=year, month=month)
+
+
+def archive_page(request, posts, year, month, **context):
+    start, end = archive.month_range(year, month)
+    posts = for_feed(posts.filter(pub_date__gte=start, pub_date__lt=end))
+    page = paginate(request, posts)
+    context.update({
+        'page': page,
+        'month': start,
+        'previous': archive.previous_month(year, month),
+        'next': (archive.next_month(year, month)
+                 if archive.is_closed(year, month) else None),
+    })
+    return render(request, 'posts/archive.html', context)
+
+
+@archive.stored
+def archive_index(request, year, month):
+    return archive_page(request, Post.objects.all(), year, month)
+
+
+@archive.stored
+def archive_group(request, slug, year, month):
+    group = get_object_or_404(Group, slug=slug)
+    return archive_page(request, group.posts.all(), year, month,
+                        group=group)
+
+
+@archive.stored
+def archive_profile(request, username, year, month):
+    author = get_object_or_404(User, username=username)
+    return archive_page(request, author.posts.all(), year, month,
+                        author=author)
+
+
+def post_cards(request):
+    """Только карточки постов ?ids=: их дозагружает живая лента."""
+    ids = [int(pk) for pk in request.GET.get('ids', '').split(',')
+           if pk.isdigit()][:CARDS_MAX_IDS]
+    posts = for_feed(Post.objects.filter(id__in=ids)).order_by('-pub_date',
+                                                               '-id')
+    return render(request, 'posts/cards.html', {'posts': posts})
+
+
 @login_required
+@ratelimit('post')
 def new_post(request):
     form = PostForm()
     if request.method == 'POST':
@@ -118,6 +191,7 @@ def server_error(request):
 
 
 @login_required
+@ratelimit('comment')
 def add_comment(request, username, post_id):
     post = get_object_or_404(Post, author__username=username, id=post_id)
     comments = post.comments.all()
@@ -134,16 +208,16 @@ def add_comment(request, username, post_id):
 
 
 @login_required
+@condition(etag_func=versions.feed_etag(versions.POSTS, versions.FOLLOWS))
 def follow_index(request):
-    post_owner = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(post_owner, settings.OBJECTS_COUNT)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    post_owner = for_feed(timeline.feed_for(request.user))
+    page = paginate(request, post_owner)
     return render(request, 'posts/follow.html',
-                  {'page': page, 'paginator': paginator})
+                  {'page': page, 'paginator': page.paginator})
 
 
 @login_required
+@ratelimit('follow', methods=('GET',))
 def profile_follow(request, username):
     follower = request.user
     following = get_object_or_404(User, username=username)
@@ -153,6 +227,7 @@ def profile_follow(request, username):
 
 
 @login_required
+@ratelimit('follow', methods=('GET',))
 def profile_unfollow(request, username):
     follower = request.user
     following = get_object_or_404(User, username=username)
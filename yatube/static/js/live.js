@@ -0,0 +1,31 @@
+// Живая лента: id новых постов приходят по SSE, карточки дозагружаются
+// одним запросом и встают в начало ленты.
+(function () {
+    var feed = document.getElementById('live-feed');
+    if (!feed || !window.EventSource) {
+        return;
+    }
+    var pending = [];
+    var timer = null;
+
+    function load() {
+        var ids = pending.splice(0, pending.length);
+        timer = null;
+        fetch(feed.dataset.cards + '?ids=' + ids.join(','), {
+            credentials: 'same-origin'
+        }).then(function (response) {
+            return response.ok ? response.text() : '';
+        }).then(function (html) {
+            feed.insertAdjacentHTML('afterbegin', html);
+        });
+    }
+
+    var source = new EventSource(feed.dataset.stream);
+    source.addEventListener('new_post', function (event) {
+        pending.push(JSON.parse(event.data).id);
+        // Пачка постов, созданных разом, дозагружается одним запросом.
+        if (timer === null) {
+            timer = setTimeout(load, 500);
+        }
+    });
+})();
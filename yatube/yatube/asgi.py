@@ -0,0 +1,30 @@
+import os
+
+from asgiref.wsgi import WsgiToAsgi
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+django_application = WsgiToAsgi(get_wsgi_application())
+
+from posts.stream import stream  # noqa: E402 (нужен настроенный Django)
+
+
+async def lifespan(scope, receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send):
+    """Поток событий отдаётся асинхронно, остальное - обычным Django."""
+    if scope['type'] == 'lifespan':
+        return await lifespan(scope, receive, send)
+    if scope['type'] == 'http' and scope['path'] == settings.EVENTS_URL:
+        return await stream(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -0,0 +1,263 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS cache ('
+    ' key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL,'
+    ' size INTEGER NOT NULL, accessed REAL NOT NULL) WITHOUT ROWID',
+    'CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)',
+    'CREATE TABLE IF NOT EXISTS stats ('
+    ' name TEXT PRIMARY KEY, value INTEGER NOT NULL) WITHOUT ROWID',
+)
+ADD_STAT = (
+    'INSERT INTO stats (name, value) VALUES (?, ?) '
+    'ON CONFLICT (name) DO UPDATE SET value = value + excluded.value'
+)
+
+
+class SQLiteCache(BaseCache):
+    """Кеш в файле SQLite (WAL), общий для всех процессов на хосте.
+
+    LOCATION - путь к файлу. OPTIONS:
+    MAX_BYTES - бюджет на значения, сверх него вытесняются давно не
+    читанные ключи (LRU); ACCESS_RESOLUTION - не чаще скольких секунд
+    обновлять время чтения ключа; STATS_FLUSH - через сколько
+    обращений сбрасывать счётчики попаданий и промахов в файл.
+    Целые числа хранятся как INTEGER, поэтому incr/decr атомарны.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._path = location
+        self._max_bytes = int(options.get('MAX_BYTES', 64 * 1024 * 1024))
+        self._resolution = float(options.get('ACCESS_RESOLUTION', 1))
+        self._stats_flush = int(options.get('STATS_FLUSH', 100))
+        self._local = threading.local()
+
+    @property
+    def _db(self):
+        # Соединение своё у каждого потока и заново открывается после fork.
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            local.db = sqlite3.connect(self._path, timeout=5,
+                                       isolation_level=None)
+            local.db.execute('PRAGMA journal_mode=WAL')
+            local.db.execute('PRAGMA synchronous=NORMAL')
+            for statement in SCHEMA:
+                local.db.execute(statement)
+            local.pid = os.getpid()
+            local.hits = local.misses = 0
+        return local.db
+
+    def _write(self):
+        return _Transaction(self._db)
+
+    def _count(self, hit):
+        local = self._local
+        if hit:
+            local.hits += 1
+        else:
+            local.misses += 1
+        if local.hits + local.misses >= self._stats_flush:
+            self._flush_stats()
+
+    def _flush_stats(self):
+        local = self._local
+        with self._write() as db:
+            db.executemany(ADD_STAT, [('hits', local.hits),
+                                      ('misses', local.misses)])
+            local.hits = local.misses = 0
+
+    def _fetch(self, key, now):
+        row = self._db.execute(
+            'SELECT value, expires, accessed FROM cache WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value, expires, accessed = row
+        if expires is not None and expires <= now:
+            with self._write() as db:
+                self._delete(db, key)
+            return None
+        if accessed < now - self._resolution:
+            self._db.execute('UPDATE cache SET accessed = ? WHERE key = ?',
+                             (now, key))
+        return value
+
+    @staticmethod
+    def _dumps(value):
+        if type(value) is int and -2 ** 63 <= value < 2 ** 63:
+            return value, 8
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        return data, len(data)
+
+    @staticmethod
+    def _loads(value):
+        if isinstance(value, int):
+            return value
+        return pickle.loads(value)
+
+    @staticmethod
+    def _delete(db, key):
+        row = db.execute('SELECT size FROM cache WHERE key = ?',
+                         (key,)).fetchone()
+        if row is not None:
+            db.execute('DELETE FROM cache WHERE key = ?', (key,))
+            db.execute(ADD_STAT, ('bytes', -row[0]))
+        return row is not None
+
+    def _store(self, db, key, value, timeout, now):
+        data, size = self._dumps(value)
+        self._delete(db, key)
+        db.execute(
+            'INSERT INTO cache (key, value, expires, size, accessed) '
+            'VALUES (?, ?, ?, ?, ?)',
+            (key, data, self.get_backend_timeout(timeout), size, now)
+        )
+        db.execute(ADD_STAT, ('bytes', size))
+        self._evict(db, now)
+
+    def _evict(self, db, now):
+        used = db.execute(
+            "SELECT value FROM stats WHERE name = 'bytes'"
+        ).fetchone()[0]
+        if used <= self._max_bytes:
+            return
+        freed = db.execute(
+            'SELECT coalesce(sum(size), 0) FROM cache WHERE expires <= ?',
+            (now,)
+        ).fetchone()[0]
+        db.execute('DELETE FROM cache WHERE expires <= ?', (now,))
+        used -= freed
+        victims = []
+        for key, size in db.execute(
+                'SELECT key, size FROM cache ORDER BY accessed'):
+            if used <= self._max_bytes:
+                break
+            victims.append((key,))
+            used -= size
+            freed += size
+        db.executemany('DELETE FROM cache WHERE key = ?', victims)
+        db.execute(ADD_STAT, ('bytes', -freed))
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        now = time.time()
+        with self._write() as db:
+            row = db.execute('SELECT expires FROM cache WHERE key = ?',
+                             (key,)).fetchone()
+            if row is not None and (row[0] is None or row[0] > now):
+                return False
+            self._store(db, key, value, timeout, now)
+            return True
+
+    def get(self, key, default=None, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        value = self._fetch(key, time.time())
+        self._count(value is not None)
+        if value is None:
+            return default
+        return self._loads(value)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        with self._write() as db:
+            self._store(db, key, value, timeout, time.time())
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        now = time.time()
+        with self._write() as db:
+            return db.execute(
+                'UPDATE cache SET expires = ?, accessed = ? '
+                'WHERE key = ? AND (expires IS NULL OR expires > ?)',
+                (self.get_backend_timeout(timeout), now, key, now)
+            ).rowcount > 0
+
+    def delete(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        with self._write() as db:
+            return self._delete(db, key)
+
+    def has_key(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return self._db.execute(
+            'SELECT 1 FROM cache WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)', (key, time.time())
+        ).fetchone() is not None
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        now = time.time()
+        with self._write() as db:
+            row = db.execute(
+                'SELECT value, expires FROM cache WHERE key = ? '
+                'AND (expires IS NULL OR expires > ?)', (key, now)
+            ).fetchone()
+            if row is None:
+                raise ValueError("Key '%s' not found" % key)
+            if not isinstance(row[0], int):
+                value = self._loads(row[0]) + delta
+                timeout = None if row[1] is None else row[1] - now
+                self._store(db, key, value, timeout, now)
+                return value
+            db.execute(
+                'UPDATE cache SET value = value + ?, accessed = ? '
+                'WHERE key = ?', (delta, now, key)
+            )
+            return row[0] + delta
+
+    def get_many(self, keys, version=None):
+        result = {}
+        for key in keys:
+            value = self.get(key, _MISSING, version=version)
+            if value is not _MISSING:
+                result[key] = value
+        return result
+
+    def clear(self):
+        with self._write() as db:
+            db.execute('DELETE FROM cache')
+            db.execute("DELETE FROM stats WHERE name = 'bytes'")
+
+    def stats(self):
+        """Попадания и промахи всех процессов, объём и число ключей."""
+        self._flush_stats()
+        result = dict(self._db.execute('SELECT name, value FROM stats'))
+        result.setdefault('hits', 0)
+        result.setdefault('misses', 0)
+        result.setdefault('bytes', 0)
+        result['entries'] = self._db.execute(
+            'SELECT count(*) FROM cache'
+        ).fetchone()[0]
+        return result
+
+
+class _Transaction:
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        # IMMEDIATE сразу берёт блокировку записи: чтение и запись внутри
+        # транзакции не пересекаются с другими процессами.
+        self.db.execute('BEGIN IMMEDIATE')
+        return self.db
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.db.execute('ROLLBACK' if exc_type else 'COMMIT')
+
+
+_MISSING = object()
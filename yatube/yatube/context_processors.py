@@ -1,6 +1,12 @@
 import datetime as dt
 
+from django.conf import settings
+
 
 def year(request):
     year = dt.datetime.now().year
     return {"year": year}
+
+
+def events_url(request):
+    return {"events_url": settings.EVENTS_URL}
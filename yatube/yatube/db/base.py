@@ -0,0 +1,79 @@
+import random
+import sqlite3
+import time
+
+from django.db.backends.sqlite3 import base
+
+# Прагмы каждого нового соединения; переопределяются OPTIONS['pragmas'].
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -64000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+RETRIES = 5
+RETRY_DELAY = 0.05
+
+
+class CursorWrapper(base.SQLiteCursorWrapper):
+    """Повторяет запрос вне транзакции, если база занята.
+
+    Внутри транзакции повтор ничего не даст - ждать нужно снаружи, поэтому
+    транзакции сразу берут блокировку записи (BEGIN IMMEDIATE), и ждёт
+    своей очереди именно BEGIN.
+    """
+
+    retries = RETRIES
+    retry_delay = RETRY_DELAY
+
+    def execute(self, query, params=None):
+        return self._retry(super().execute, query, params)
+
+    def executemany(self, query, param_list):
+        return self._retry(super().executemany, query, list(param_list))
+
+    def _retry(self, method, *args):
+        delay = self.retry_delay
+        for attempt in range(self.retries + 1):
+            try:
+                return method(*args)
+            except sqlite3.OperationalError as error:
+                if ('database is locked' not in str(error)
+                        or self.connection.in_transaction
+                        or attempt == self.retries):
+                    raise
+            time.sleep(delay * (1 + random.random()))
+            delay *= 2
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """SQLite для многопоточного сервера: WAL, прагмы, повтор при
+    блокировке. Держать соединения между запросами - CONN_MAX_AGE.
+
+    OPTIONS: pragmas - словарь прагм поверх PRAGMAS, retries и
+    retry_delay - сколько раз и с какой начальной паузой повторять.
+    """
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.pragmas = {**PRAGMAS, **params.pop('pragmas', {})}
+        self.retries = params.pop('retries', RETRIES)
+        self.retry_delay = params.pop('retry_delay', RETRY_DELAY)
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def create_cursor(self, name=None):
+        cursor = self.connection.cursor(factory=CursorWrapper)
+        cursor.retries = self.retries
+        cursor.retry_delay = self.retry_delay
+        return cursor
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute('BEGIN IMMEDIATE')
@@ -0,0 +1,143 @@
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.shortcuts import render
+
+# Ячейка: хеш ключа (0 - свободна), запас токенов, время обновления.
+SLOT = struct.Struct('<Qdd')
+PROBES = 8
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """'20/m' -> (20, 20 / 60): ёмкость ведра и пополнение в секунду."""
+    count, period = rate.split('/')
+    count = int(count)
+    return count, count / PERIODS[period[0]]
+
+
+class BucketStore:
+    """Token bucket'ы в общем для всех процессов файле, отображённом в память.
+
+    Таблица фиксированного размера с открытой адресацией. Обновление
+    ведра - чтение и запись одной ячейки под flock, без обращений к базе.
+    Если для ключа нет места, вытесняется ведро, которое дольше всех не
+    трогали: простаивавшее ведро и так было бы полным.
+    """
+
+    def __init__(self, path, slots):
+        self.path = path
+        self.slots = slots
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def _open(self):
+        # После fork отображение и дескриптор открываются заново.
+        if self._pid != os.getpid():
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            size = self.slots * SLOT.size
+            if os.fstat(fd).st_size < size:
+                os.ftruncate(fd, size)
+            self._fd = fd
+            self._map = mmap.mmap(fd, size)
+            self._pid = os.getpid()
+        return self._map
+
+    @staticmethod
+    def _hash(key):
+        digest = hashlib.blake2b(key.encode(), digest_size=8).digest()
+        return int.from_bytes(digest, 'little') or 1
+
+    def take(self, key, capacity, rate, cost=1, now=None):
+        """Списывает cost токенов; None или через сколько секунд повторить."""
+        now = time.time() if now is None else now
+        key_hash = self._hash(key)
+        with self._lock:
+            table = self._open()
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                offset, tokens, updated = self._find(table, key_hash,
+                                                     capacity, now)
+                tokens = min(capacity, tokens + (now - updated) * rate)
+                allowed = tokens >= cost
+                if allowed:
+                    tokens -= cost
+                SLOT.pack_into(table, offset, key_hash, tokens, now)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        if allowed:
+            return None
+        return (cost - tokens) / rate
+
+    def _find(self, table, key_hash, capacity, now):
+        start = key_hash % self.slots
+        oldest = None
+        for probe in range(PROBES):
+            offset = (start + probe) % self.slots * SLOT.size
+            stored, tokens, updated = SLOT.unpack_from(table, offset)
+            if stored == key_hash:
+                return offset, tokens, updated
+            if stored == 0:
+                return offset, capacity, now
+            if oldest is None or updated < oldest[1]:
+                oldest = (offset, updated)
+        return oldest[0], capacity, now
+
+    def reset(self):
+        with self._lock:
+            table = self._open()
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                table[:] = bytes(len(table))
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+
+_stores = {}
+
+
+def get_store():
+    path = settings.RATELIMIT_STORE
+    if path not in _stores:
+        _stores[path] = BucketStore(path, settings.RATELIMIT_SLOTS)
+    return _stores[path]
+
+
+def check(request, scope):
+    """Ведро пользователя и ведро IP; None или Retry-After в секундах."""
+    rates = settings.RATELIMIT_RATES.get(scope, {})
+    keys = []
+    if request.user.is_authenticated:
+        keys.append(('user', f'{scope}:user:{request.user.pk}'))
+    keys.append(('ip', f'{scope}:ip:{request.META.get("REMOTE_ADDR")}'))
+    store = get_store()
+    for kind, key in keys:
+        if not rates.get(kind):
+            continue
+        retry_after = store.take(key, *parse_rate(rates[kind]))
+        if retry_after is not None:
+            return retry_after
+    return None
+
+
+def ratelimit(scope, methods=('POST',)):
+    """Ограничивает частоту запросов к view, сверх лимита - ответ 429."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method in methods:
+                retry_after = check(request, scope)
+                if retry_after is not None:
+                    response = render(request, 'misc/429.html', status=429)
+                    response['Retry-After'] = str(int(retry_after) + 1)
+                    return response
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,128 @@
+import random
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import SAFE_METHODS
+
+from posts import versions
+
+PIN_COOKIE = 'db_pin'
+SYNCED_KEY = 'replica_synced:{}'
+# Сессии и пользователи читаются из основной базы: иначе только что
+# вошедший или зарегистрированный пользователь после окончания pin
+# выглядит анонимом, пока реплику не обновят.
+PRIMARY_APPS = ('auth', 'contenttypes', 'sessions')
+
+_state = threading.local()
+
+
+def synced(alias):
+    """Когда снят снимок реплики; None - реплику ещё не заполняли."""
+    return cache.get(SYNCED_KEY.format(alias))
+
+
+def is_stale(alias):
+    """Отстала ли реплика от версий коллекций; без отметки - отстала."""
+    started = synced(alias)
+    return started is None or started < max(
+        versions.get(name)
+        for name in (versions.POSTS, versions.FOLLOWS, versions.GROUPS)
+    )
+
+
+def refresh(alias):
+    """Снимок основной базы в файл реплики через online backup API.
+
+    Копия пишется поверх файла: открытые соединения реплики увидят новые
+    данные, как после обычной записи в базу.
+    """
+    started = time.time()
+    source = sqlite3.connect(settings.DATABASES[DEFAULT_DB_ALIAS]['NAME'])
+    target = sqlite3.connect(settings.DATABASES[alias]['NAME'])
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+    cache.set(SYNCED_KEY.format(alias), started, None)
+    return started
+
+
+def lagging():
+    """Читает ли текущий запрос из отставшей реплики."""
+    alias = getattr(_state, 'alias', None)
+    return alias is not None and is_stale(alias)
+
+
+class ReplicaRouter:
+    """Чтение - из реплики, выбранной ReplicaMiddleware для запроса.
+
+    После первой записи в запросе и внутри транзакции основной базы
+    чтение идёт из основной: обработчики сигналов и редирект после
+    записи должны видеть только что записанное.
+    """
+
+    def db_for_read(self, model, **hints):
+        if (model._meta.app_label in PRIMARY_APPS
+                or getattr(_state, 'written', False)
+                or connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            return None
+        return getattr(_state, 'alias', None)
+
+    def db_for_write(self, model, **hints):
+        _state.written = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+class ReplicaMiddleware:
+    """GET и HEAD читают из реплик, остальное - из основной базы.
+
+    После записи - любым методом, подписка идёт через GET - клиент
+    получает cookie и REPLICA_PIN_SECONDS читает из
+    основной базы: свой новый пост он увидит сразу. Ответ из отставшей
+    реплики уходит без ETag, чтобы старые данные не закешировались под
+    валидатором новой версии.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        alias = None
+        if (request.method in SAFE_METHODS
+                and PIN_COOKIE not in request.COOKIES):
+            alias = self.choose()
+        _state.alias = alias
+        _state.written = False
+        try:
+            response = self.get_response(request)
+            written = _state.written
+        finally:
+            _state.alias = None
+            _state.written = False
+        if written or request.method not in SAFE_METHODS:
+            response.set_cookie(PIN_COOKIE, '1', httponly=True,
+                                max_age=settings.REPLICA_PIN_SECONDS)
+        elif alias is not None and is_stale(alias):
+            for header in ('ETag', 'Last-Modified'):
+                if header in response:
+                    del response[header]
+        return response
+
+    @staticmethod
+    def choose():
+        ready = [alias for alias in settings.DATABASE_REPLICAS
+                 if synced(alias) is not None]
+        return random.choice(ready) if ready else None
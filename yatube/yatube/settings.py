@@ -1,4 +1,9 @@
+import atexit
 import os
+import shutil
+import sys
+import tempfile
+
 import environ
 
 env = environ.Env()
@@ -6,6 +11,15 @@ environ.Env.read_env()
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
+# Файлы кеша и лимитов запросов общие для процессов сайта. Тесты
+# получают свои во временном каталоге: cache.clear() в тестах не стирает
+# кеш сайта, а корзины лимитов не копятся от запуска к запуску.
+TESTING = sys.argv[1:2] == ['test'] or 'pytest' in sys.modules
+STATE_DIR = BASE_DIR
+if TESTING:
+    STATE_DIR = tempfile.mkdtemp(prefix='yatube-test-')
+    atexit.register(shutil.rmtree, STATE_DIR, True)
+
 SECRET_KEY = 'p5t03kzv7q!ja!tko90$pc^j5r!1y0!5%vion8kgo^6olm4aa@'
 
 DEBUG = False
@@ -43,6 +57,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'yatube.replicas.ReplicaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     #"debug_toolbar.middleware.DebugToolbarMiddleware",
@@ -59,6 +74,7 @@ TEMPLATES = [
         'OPTIONS': {
             'context_processors': [
                 'yatube.context_processors.year',
+                'yatube.context_processors.events_url',
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
@@ -77,14 +93,30 @@ EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
+ASGI_APPLICATION = 'yatube.asgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'yatube.db',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': 600,
     }
 }
 
+# Реплики для чтения - снимки основной базы (manage.py refresh_replicas).
+DATABASE_REPLICAS = [
+    f'replica{number}'
+    for number in range(1, env.int('DATABASE_REPLICAS', default=0) + 1)
+]
+for alias in DATABASE_REPLICAS:
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'NAME': os.path.join(BASE_DIR, f'db.{alias}.sqlite3'),
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['yatube.replicas.ReplicaRouter']
+REPLICA_PIN_SECONDS = 5
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -119,11 +151,26 @@ STATICFILES_DIRS = ( os.path.join('static'), )
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+FILE_UPLOAD_HANDLERS = [
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
+IMAGE_UPLOAD_MAX_BYTES = 20 * 1024 * 1024
+IMAGE_UPLOAD_MAX_PIXELS = 25_000_000
+IMAGE_UPLOAD_FORMATS = ('JPEG', 'PNG', 'GIF', 'WEBP')
+IMAGE_UPLOAD_WORKERS = 2
+
 OBJECTS_COUNT = 10
 
+TIMELINE_FANOUT_LIMIT = 5000
+
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'yatube.cache.SQLiteCache',
+        'LOCATION': os.path.join(STATE_DIR, 'cache.sqlite3'),
+        'OPTIONS': {
+            'MAX_BYTES': 64 * 1024 * 1024,
+        },
     }
 }
 
@@ -136,6 +183,23 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-    ]
+        'api.authentication.CachedJWTAuthentication',
+    ],
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.KeysetPagination',
+    'DEFAULT_THROTTLE_CLASSES': [
+        'api.throttling.TokenBucketThrottle',
+    ],
+}
+
+JWT_USER_CACHE_TIMEOUT = 300
+JWT_TOKEN_CACHE_SIZE = 10000
+
+EVENTS_URL = '/events/'
+
+RATELIMIT_STORE = os.path.join(STATE_DIR, 'ratelimit.mmap')
+RATELIMIT_SLOTS = 65536
+RATELIMIT_RATES = {
+    'post': {'user': '20/m', 'ip': '100/m'},
+    'comment': {'user': '60/m', 'ip': '300/m'},
+    'follow': {'user': '60/m', 'ip': '300/m'},
 }
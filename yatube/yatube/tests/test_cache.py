@@ -0,0 +1,78 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+
+from django.test import SimpleTestCase
+
+from ..cache import SQLiteCache
+
+
+def make_cache(path, **options):
+    return SQLiteCache(path, {'OPTIONS': options})
+
+
+def increment(path, times):
+    cache = make_cache(path)
+    for _ in range(times):
+        cache.incr('counter')
+
+
+class SQLiteCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'cache.sqlite3')
+        self.cache = make_cache(self.path, MAX_BYTES=2000)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_get_set_delete(self):
+        """Значения сохраняются, читаются и удаляются"""
+        self.cache.set('key', {'a': [1, 2]})
+        self.assertEqual(self.cache.get('key'), {'a': [1, 2]})
+        self.assertFalse(self.cache.add('key', 'other'))
+        self.assertTrue(self.cache.delete('key'))
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_expiration(self):
+        """Просроченный ключ не возвращается"""
+        self.cache.set('key', 'value', 0.05)
+        time.sleep(0.1)
+        self.assertIsNone(self.cache.get('key'))
+        self.assertTrue(self.cache.add('key', 'new'))
+
+    def test_shared_between_processes(self):
+        """incr атомарен при одновременной работе нескольких процессов"""
+        self.cache.set('counter', 0)
+        workers = [
+            multiprocessing.Process(target=increment, args=(self.path, 50))
+            for _ in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(self.cache.get('counter'), 200)
+
+    def test_lru_eviction(self):
+        """При превышении бюджета вытесняются давно не читанные ключи"""
+        cache = make_cache(self.path, MAX_BYTES=2000, ACCESS_RESOLUTION=0)
+        for i in range(3):
+            cache.set(f'key{i}', 'x' * 500)
+        cache.get('key0')
+        for i in range(3, 5):
+            cache.set(f'key{i}', 'x' * 500)
+        self.assertIsNotNone(cache.get('key0'))
+        self.assertIsNone(cache.get('key1'))
+        self.assertLessEqual(cache.stats()['bytes'], 2000)
+
+    def test_stats(self):
+        """Статистика попаданий и промахов"""
+        self.cache.set('key', 'value')
+        self.cache.get('key')
+        self.cache.get('missing')
+        stats = self.cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+        self.assertEqual(stats['entries'], 1)
@@ -0,0 +1,81 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+
+from django.db import connection as default_connection
+from django.db.utils import ConnectionHandler
+from django.test import Client, SimpleTestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import User
+
+
+class SQLiteBackendTest(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'db.sqlite3')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def connect(self, **options):
+        connection = ConnectionHandler({'default': {
+            'ENGINE': 'yatube.db', 'NAME': self.path, 'OPTIONS': options,
+        }})['default']
+        self.addCleanup(connection.close)
+        return connection
+
+    def test_pragmas(self):
+        """Новое соединение в WAL и с настроенными прагмами"""
+        connection = self.connect(pragmas={'cache_size': -1000})
+        with connection.cursor() as cursor:
+            for pragma, value in (('journal_mode', 'wal'),
+                                  ('synchronous', 1),
+                                  ('busy_timeout', 5000),
+                                  ('cache_size', -1000)):
+                cursor.execute(f'PRAGMA {pragma}')
+                self.assertEqual(cursor.fetchone()[0], value)
+
+    def test_retry_when_locked(self):
+        """Занятая база - запрос повторяется с паузой, а не падает"""
+        connection = self.connect(pragmas={'busy_timeout': 0},
+                                  retry_delay=0.02)
+        with connection.cursor() as cursor:
+            cursor.execute('CREATE TABLE item (id INTEGER PRIMARY KEY)')
+        other = sqlite3.connect(self.path, isolation_level=None,
+                                check_same_thread=False)
+        other.execute('BEGIN IMMEDIATE')
+        release = threading.Timer(0.1, other.execute, ['COMMIT'])
+        release.start()
+        with connection.cursor() as cursor:
+            cursor.execute('INSERT INTO item DEFAULT VALUES')
+            cursor.execute('SELECT count(*) FROM item')
+            self.assertEqual(cursor.fetchone()[0], 1)
+        release.join()
+        other.close()
+
+    def test_no_retry(self):
+        """Без повторов занятая база сразу даёт ошибку"""
+        connection = self.connect(pragmas={'busy_timeout': 0}, retries=0)
+        connection.ensure_connection()
+        other = sqlite3.connect(self.path, isolation_level=None)
+        other.execute('BEGIN IMMEDIATE')
+        self.addCleanup(other.close)
+        with self.assertRaisesMessage(Exception, 'database is locked'):
+            with connection.cursor() as cursor:
+                cursor.execute('CREATE TABLE item (id INTEGER PRIMARY KEY)')
+
+
+class WriteLockTest(TransactionTestCase):
+    def test_form_page_without_write_lock(self):
+        """Страница формы не берёт блокировку записи (BEGIN IMMEDIATE)"""
+        client = Client()
+        client.force_login(User.objects.create_user(username='TestUser'))
+        with CaptureQueriesContext(default_connection) as queries:
+            response = client.get(reverse('new_post'))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([query for query in queries
+                          if query['sql'].startswith('BEGIN')])
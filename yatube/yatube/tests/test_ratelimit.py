@@ -0,0 +1,61 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase
+
+from ..ratelimit import BucketStore, parse_rate
+
+
+def take(path, times, results):
+    store = BucketStore(path, 64)
+    allowed = sum(store.take('shared', 100, 0.001) is None
+                  for _ in range(times))
+    results.put(allowed)
+
+
+class BucketStoreTest(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'ratelimit.mmap')
+        self.store = BucketStore(self.path, 64)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_parse_rate(self):
+        """Лимит задаётся как число запросов за секунду, минуту, час"""
+        self.assertEqual(parse_rate('20/m'), (20, 20 / 60))
+        self.assertEqual(parse_rate('5/sec'), (5, 5))
+
+    def test_bucket_refill(self):
+        """Ведро опустошается и пополняется со временем"""
+        for _ in range(3):
+            self.assertIsNone(self.store.take('key', 3, 1, now=100))
+        self.assertAlmostEqual(self.store.take('key', 3, 1, now=100), 1)
+        self.assertAlmostEqual(self.store.take('key', 3, 1, now=100.5),
+                               0.5)
+        self.assertIsNone(self.store.take('key', 3, 1, now=101.5))
+        self.assertIsNone(self.store.take('other', 3, 1, now=101.5))
+
+    def test_eviction(self):
+        """Переполненная таблица вытесняет давно не тронутые вёдра"""
+        store = BucketStore(self.path, 1)
+        self.assertIsNone(store.take('first', 1, 0.001, now=1))
+        self.assertIsNone(store.take('second', 1, 0.001, now=2))
+        self.assertIsNotNone(store.take('second', 1, 0.001, now=3))
+
+    def test_shared_between_processes(self):
+        """Ведро общее для процессов и списывается атомарно"""
+        results = multiprocessing.Queue()
+        workers = [
+            multiprocessing.Process(target=take,
+                                    args=(self.path, 50, results))
+            for _ in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(sum(results.get() for _ in workers), 100)
@@ -0,0 +1,132 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.db import router
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from posts import versions
+from posts.models import Post, User
+
+from .. import replicas
+
+
+def read_alias(request):
+    response = HttpResponse(router.db_for_read(Post))
+    response['ETag'] = '"etag"'
+    return response
+
+
+def write_then_read(request):
+    router.db_for_write(Post)
+    return HttpResponse(router.db_for_read(Post))
+
+
+def evict_synced(request):
+    cache.delete(replicas.SYNCED_KEY.format('replica1'))
+    return read_alias(request)
+
+
+@override_settings(DATABASE_REPLICAS=['replica1', 'replica2'],
+                   REPLICA_PIN_SECONDS=5)
+class ReplicaRoutingTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.middleware = replicas.ReplicaMiddleware(read_alias)
+
+    def sync(self, *aliases):
+        for alias in aliases:
+            cache.set(replicas.SYNCED_KEY.format(alias), 2e9, None)
+
+    def test_reads_from_synced_replica(self):
+        """GET читает из заполненной реплики, пустые не используются"""
+        response = self.middleware(self.factory.get('/'))
+        self.assertEqual(response.content, b'default')
+        self.sync('replica2')
+        response = self.middleware(self.factory.get('/'))
+        self.assertEqual(response.content, b'replica2')
+        self.assertEqual(router.db_for_read(Post), 'default')
+        self.assertEqual(router.db_for_write(Post), 'default')
+
+    def test_writes_pin_primary(self):
+        """После записи клиент какое-то время читает из основной базы"""
+        self.sync('replica1', 'replica2')
+        response = self.middleware(self.factory.post('/new/'))
+        self.assertEqual(response.content, b'default')
+        cookie = response.cookies[replicas.PIN_COOKIE]
+        self.assertEqual(cookie['max-age'], 5)
+        request = self.factory.get('/')
+        request.COOKIES[replicas.PIN_COOKIE] = cookie.value
+        self.assertEqual(self.middleware(request).content, b'default')
+
+    def test_stale_replica_without_etag(self):
+        """Ответ из отставшей реплики не получает ETag"""
+        cache.set(replicas.SYNCED_KEY.format('replica1'), 1, None)
+        cache.set(versions.KEY.format(versions.POSTS), 10, None)
+        response = self.middleware(self.factory.get('/'))
+        self.assertEqual(response.content, b'replica1')
+        self.assertNotIn('ETag', response)
+        self.sync('replica1')
+        self.assertIn('ETag', self.middleware(self.factory.get('/')))
+
+    def test_write_on_get(self):
+        """Запись в GET-запросе: дальше чтение из основной базы и pin"""
+        self.sync('replica1', 'replica2')
+        response = replicas.ReplicaMiddleware(write_then_read)(
+            self.factory.get('/author/follow/')
+        )
+        self.assertEqual(response.content, b'default')
+        self.assertIn(replicas.PIN_COOKIE, response.cookies)
+        response = self.middleware(self.factory.get('/'))
+        self.assertNotIn(replicas.PIN_COOKIE, response.cookies)
+
+    def test_sessions_and_users_from_primary(self):
+        """Сессии и пользователи читаются из основной базы"""
+        self.sync('replica1', 'replica2')
+
+        def aliases(request):
+            return HttpResponse(' '.join(
+                router.db_for_read(model) for model in (Session, User, Post)
+            ))
+
+        response = replicas.ReplicaMiddleware(aliases)(self.factory.get('/'))
+        self.assertRegex(response.content.decode(),
+                         r'^default default replica\d$')
+
+    def test_evicted_sync_is_stale(self):
+        """Пропавшая из кеша отметка снимка считается отставанием"""
+        self.sync('replica1')
+        response = replicas.ReplicaMiddleware(evict_synced)(
+            self.factory.get('/')
+        )
+        self.assertEqual(response.content, b'replica1')
+        self.assertNotIn('ETag', response)
+
+
+class RefreshTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def test_refresh(self):
+        """Снимок копирует основную базу и запоминает время"""
+        source = os.path.join(self.directory, 'db.sqlite3')
+        target = os.path.join(self.directory, 'replica.sqlite3')
+        with sqlite3.connect(source) as db:
+            db.execute('CREATE TABLE item (id INTEGER PRIMARY KEY)')
+            db.execute('INSERT INTO item DEFAULT VALUES')
+        databases = {'default': {'NAME': source},
+                     'replica1': {'NAME': target}}
+        with override_settings(DATABASES=databases):
+            started = replicas.refresh('replica1')
+        self.assertEqual(replicas.synced('replica1'), started)
+        with sqlite3.connect(target) as db:
+            self.assertEqual(
+                db.execute('SELECT count(*) FROM item').fetchone(), (1,)
+            )